@@ -11,20 +11,116 @@
 - 生成报告
 
 使用方法:
-    python build_local.py
+    python build_local.py                # 增量打包（复用 PyInstaller 缓存）
+    python build_local.py --clean        # 清理后完整打包
+    python build_local.py --clean-cache  # 删除 PyInstaller 工作目录缓存后打包
 """
 
 import os
 import sys
+import argparse
+import hashlib
+import logging
+import logging.handlers
 import subprocess
 import shutil
+import stat
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from importlib.util import find_spec
 from pathlib import Path
 
+# 构建日志：先缓冲到内存，满 LOG_BUFFER_RECORDS 条、遇到错误或分节时再统一写出
+log = logging.getLogger('build')
+LOG_BUFFER_RECORDS = 256
+
+# 最低 Python 版本（dataclass(slots=True) 需要 3.10，与 CI 一致）
+MIN_PYTHON = (3, 10)
+
+# 打包必需的库（元组保持检查输出顺序，也作为缓存键的一部分）
+REQUIRED_PACKAGES = ('pydivert', 'psutil', 'pyinstaller')
+
+# pip 包名与导入名不一致的库
+PACKAGE_MODULES = {'pyinstaller': 'PyInstaller'}
+
+# 依赖检查通过的标记目录（按解释器和依赖列表的哈希区分）
+DEPCHECK_CACHE_DIR = Path('build/.depcheck')
+
+# 遍历项目目录（查找 __pycache__、计算源码哈希）时不进入的目录
+SCAN_SKIP_DIRS = frozenset({'.git', '.venv', 'venv', 'dist', 'build', 'node_modules'})
+
+# EXE 体积评级：(上限 MB, 控制台提示, 报告评级行)，按上限升序排列
+SIZE_RATINGS = (
+    (5, "✓ 优秀! 文件大小 < 5MB", "- 评级: ⭐⭐⭐ 优秀 (< 5MB)\n"),
+    (10, "✓ 良好! 文件大小 < 10MB", "- 评级: ⭐⭐ 良好 (< 10MB)\n"),
+    (20, "⚠️  警告: 文件大小 < 20MB，但超过目标", "- 评级: ⭐ 一般 (< 20MB)\n"),
+    (float('inf'), "❌ 文件大小过大 (> 20MB)", "- 评级: ❌ 需要优化 (> 20MB)\n"),
+)
+
+# 删除文件被占用时的重试间隔（秒）
+RMTREE_RETRY_DELAYS = (0.05, 0.2, 0.5, 1.0)
+
+# PyInstaller 工作目录（Analysis/PYZ 缓存）放在用户缓存目录，切换分支或删除 build/ 后仍可复用
+PYI_WORKPATH = Path(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()) / 'fengbao' / 'pyi-work'
+
+# 计算文件哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 打包产物及其源码哈希（哈希一致时跳过 PyInstaller）
+EXE_PATH = Path('dist/fengbao.exe')
+BUILD_HASH_PATH = Path('dist/.fengbao.exe.buildhash')
+
+def setup_logging():
+    """配置构建日志（仅输出消息本身，与原 print 输出格式一致）"""
+    if log.handlers:
+        return
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    buffer_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_RECORDS,
+        flushLevel=logging.ERROR,
+        target=stream_handler
+    )
+    
+    log.addHandler(buffer_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+def flush_log():
+    """立即写出缓冲中的日志"""
+    for handler in log.handlers:
+        handler.flush()
+
 def print_section(title):
     """打印分节标题"""
-    print("\n" + "=" * 60)
-    print(f"  {title}")
-    print("=" * 60)
+    flush_log()
+    log.info("\n" + "=" * 60)
+    log.info(f"  {title}")
+    log.info("=" * 60)
+
+def _new_cache_hash(*parts):
+    """创建缓存键用的 blake2b 哈希，依次写入各个字符串（以 \\0 分隔）"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h
+
+def _depcheck_key(required_packages):
+    """依赖检查缓存键：解释器路径 + 版本 + 依赖列表"""
+    return _new_cache_hash(sys.executable, sys.version, *required_packages).hexdigest()
+
+def _is_installed(package):
+    """检查包是否可导入（只查找模块，不执行其 __init__）"""
+    module_name = PACKAGE_MODULES.get(package, package)
+    try:
+        return find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
 
 def check_dependencies():
     """检查依赖"""
@@ -33,216 +129,444 @@ def check_dependencies():
     missing = []
     
     # 检查 Python 版本
-    print(f"Python 版本: {sys.version}")
-    if sys.version_info < (3, 6):
-        print("❌ 错误: 需要 Python 3.6 或更高版本")
+    log.info(f"Python 版本: {sys.version}")
+    if sys.version_info < MIN_PYTHON:
+        log.error(f"❌ 错误: 需要 Python {'.'.join(map(str, MIN_PYTHON))} 或更高版本")
         return False
-    print("✓ Python 版本符合要求")
+    log.info("✓ Python 版本符合要求")
     
     # 检查必要的库
-    required_packages = ['pydivert', 'psutil', 'pyinstaller']
+    # 同一解释器 + 同一依赖列表已检查通过，跳过检查
+    marker = DEPCHECK_CACHE_DIR / _depcheck_key(REQUIRED_PACKAGES)
+    if marker.exists():
+        log.info("✓ 依赖已检查通过（使用缓存结果）")
+        return True
     
-    for package in required_packages:
-        try:
-            __import__(package)
-            print(f"✓ {package} 已安装")
-        except ImportError:
-            print(f"❌ {package} 未安装")
+    for package in REQUIRED_PACKAGES:
+        if _is_installed(package):
+            log.info(f"✓ {package} 已安装")
+        else:
+            log.error(f"❌ {package} 未安装")
             missing.append(package)
     
     if missing:
-        print(f"\n缺少的包: {', '.join(missing)}")
-        print(f"请运行: pip install {' '.join(missing)}")
+        log.info(f"\n缺少的包: {', '.join(missing)}")
+        log.info(f"请运行: pip install {' '.join(missing)}")
         return False
     
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError:
+        pass
+    
     return True
 
+def _walk_project(root='.'):
+    """遍历项目目录，产出 (目录, 子目录名列表, 文件名列表)，不进入 SCAN_SKIP_DIRS 中的目录"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in SCAN_SKIP_DIRS]
+        yield Path(dirpath), dirnames, filenames
+
+def find_pycache_dirs(root='.'):
+    """查找所有 __pycache__ 目录（剪枝 SCAN_SKIP_DIRS 中的目录）"""
+    found = []
+    
+    for current, dirnames, _ in _walk_project(root):
+        if '__pycache__' in dirnames:
+            found.append(current / '__pycache__')
+            # 不再进入 __pycache__ 内部
+            dirnames.remove('__pycache__')
+    
+    return found
+
+def _rmtree_onerror(func, path, exc_info):
+    """
+    shutil.rmtree 的错误处理：去掉只读属性后退避重试
+    
+    Windows 上杀毒软件可能短暂占用刚生成的 .exe/.pyd，稍后重试通常即可删除。
+    """
+    for delay in RMTREE_RETRY_DELAYS:
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            func(path)
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(delay)
+    
+    raise exc_info[1]
+
 def clean_build():
     """清理旧的构建文件"""
     print_section("清理旧的构建文件")
     
     dirs_to_clean = ['build', 'dist']
     
+    # 一次 scandir 找出实际存在的目录，而不是逐个 exists()
+    with os.scandir('.') as entries:
+        present = {
+            entry.name for entry in entries
+            if entry.name in dirs_to_clean and entry.is_dir()
+        }
+    
     for dir_name in dirs_to_clean:
-        if os.path.exists(dir_name):
-            print(f"删除 {dir_name}/ ...")
-            shutil.rmtree(dir_name)
-            print(f"✓ 已删除 {dir_name}/")
+        if dir_name in present:
+            log.info(f"删除 {dir_name}/ ...")
+            shutil.rmtree(dir_name, onerror=_rmtree_onerror)
+            log.info(f"✓ 已删除 {dir_name}/")
         else:
-            print(f"✓ {dir_name}/ 不存在，跳过")
+            log.info(f"✓ {dir_name}/ 不存在，跳过")
+    
+    # 清理 __pycache__（跳过 .git、虚拟环境等大目录，不逐个 stat 普通文件）
+    for pycache_path in find_pycache_dirs():
+        log.info(f"删除 {pycache_path} ...")
+        shutil.rmtree(pycache_path, onerror=_rmtree_onerror)
+    
+    log.info("✓ 清理完成")
+
+def clean_cache():
+    """清理 PyInstaller 工作目录缓存"""
+    print_section("清理 PyInstaller 缓存")
+    
+    if PYI_WORKPATH.exists():
+        log.info(f"删除 {PYI_WORKPATH} ...")
+        shutil.rmtree(PYI_WORKPATH, onerror=_rmtree_onerror)
+        log.info("✓ 已删除 PyInstaller 缓存")
+    else:
+        log.info("✓ PyInstaller 缓存不存在，跳过")
+
+def _package_version(package):
+    """已安装包的版本号，未安装时返回空字符串"""
+    # 在函数内导入，模块导入阶段不依赖 importlib.metadata，版本检查能先给出提示
+    from importlib.metadata import PackageNotFoundError, version as metadata_version
+    
+    try:
+        return metadata_version(package)
+    except PackageNotFoundError:
+        return ''
+
+def _source_hash():
+    """
+    计算打包输入的哈希：解释器版本 + 必需库及其已安装版本 + 项目内所有 .py 文件 + spec + requirements.txt
+    
+    升级 PyInstaller 等依赖后哈希随之变化，不会误用旧版本打出的 EXE。
+    """
+    h = _new_cache_hash(sys.version, *(
+        f"{package}=={_package_version(package)}" for package in REQUIRED_PACKAGES
+    ))
+    
+    sources = sorted(
+        current / name
+        for current, _, filenames in _walk_project()
+        for name in filenames
+        if name.endswith('.py')
+    )
+    sources.extend(Path(name) for name in ('fengbao.spec', 'requirements.txt'))
+    
+    for path in sources:
+        if not path.is_file():
+            continue
+        h.update(path.as_posix().encode('utf-8'))
+        h.update(b'\0')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                h.update(chunk)
+    
+    return h.hexdigest()
+
+def _run_pyinstaller(cmd):
+    """
+    运行 PyInstaller，返回退出码
     
-    # 清理 __pycache__
-    for root, dirs, files in os.walk('.'):
-        if '__pycache__' in dirs:
-            pycache_path = os.path.join(root, '__pycache__')
-            print(f"删除 {pycache_path} ...")
-            shutil.rmtree(pycache_path)
+    优先在当前进程内调用 PyInstaller.__main__.run()，省去一次解释器启动；
+    无法导入 PyInstaller 包时退回到子进程执行 pyinstaller 命令。
+    """
+    flush_log()
+    
+    try:
+        import PyInstaller.__main__ as pyinstaller_main
+    except ImportError:
+        pyinstaller_main = None
     
-    print("✓ 清理完成")
+    if pyinstaller_main is not None:
+        try:
+            pyinstaller_main.run(cmd[1:])
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            log.error(f"❌ {e.code}")
+            return 1
+        return 0
+    
+    # PyInstaller 输出大量日志，逐行转入缓冲日志，避免与本脚本输出交错
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors='replace',
+        bufsize=65536
+    )
+    for line in process.stdout:
+        log.info(line.rstrip('\n'))
+    return process.wait()
 
-def build_exe():
-    """执行 PyInstaller 打包"""
+def build_exe(clean=False, force=False):
+    """
+    执行 PyInstaller 打包
+    
+    Args:
+        clean: 是否让 PyInstaller 丢弃 build/ 中的缓存（默认增量打包）
+        force: 源码哈希未变化时也重新打包
+    """
     print_section("执行 PyInstaller 打包")
     
     if not os.path.exists('fengbao.spec'):
-        print("❌ 错误: fengbao.spec 文件不存在")
+        log.error("❌ 错误: fengbao.spec 文件不存在")
         return False
     
-    print("运行: pyinstaller --clean --noconfirm fengbao.spec")
-    print()
+    # 源码、spec、依赖均未变化且 EXE 仍在，直接复用上次的产物
+    source_hash = _source_hash()
+    if not (clean or force) and EXE_PATH.exists() and BUILD_HASH_PATH.exists():
+        try:
+            if BUILD_HASH_PATH.read_text(encoding='utf-8').strip() == source_hash:
+                log.info(f"✓ 源码未变化，跳过 PyInstaller（复用 {EXE_PATH}）")
+                return True
+        except OSError:
+            pass
+    
+    PYI_WORKPATH.mkdir(parents=True, exist_ok=True)
+    cmd = ['pyinstaller', '--noconfirm', '--workpath', str(PYI_WORKPATH), 'fengbao.spec']
+    if clean:
+        cmd.append('--clean')
+    
+    log.info(f"运行: {' '.join(cmd)}")
+    log.info("")
     
     try:
-        result = subprocess.run(
-            ['pyinstaller', '--clean', '--noconfirm', 'fengbao.spec'],
-            capture_output=False,
-            text=True
-        )
+        returncode = _run_pyinstaller(cmd)
         
-        if result.returncode != 0:
-            print(f"\n❌ PyInstaller 执行失败，退出码: {result.returncode}")
+        if returncode != 0:
+            log.error(f"\n❌ PyInstaller 执行失败，退出码: {returncode}")
             return False
         
-        print("\n✓ PyInstaller 执行成功")
+        log.info("\n✓ PyInstaller 执行成功")
+        
+        if EXE_PATH.exists():
+            try:
+                BUILD_HASH_PATH.write_text(source_hash, encoding='utf-8')
+            except OSError:
+                pass
+        
         return True
         
     except FileNotFoundError:
-        print("❌ 错误: 找不到 pyinstaller 命令")
-        print("请运行: pip install pyinstaller")
+        log.error("❌ 错误: 找不到 pyinstaller 命令")
+        log.info("请运行: pip install pyinstaller")
         return False
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log.error(f"❌ 错误: {e}")
         return False
 
+def _rate_size(size_mb):
+    """
+    评估 EXE 体积
+    
+    Returns:
+        (控制台提示, 报告评级行)
+    """
+    for limit_mb, console_msg, report_line in SIZE_RATINGS:
+        if size_mb < limit_mb:
+            return console_msg, report_line
+
 def verify_exe():
-    """验证 EXE 文件"""
-    print_section("验证 EXE 文件")
+    """
+    验证 EXE 文件
     
-    exe_path = Path('dist/fengbao.exe')
+    Returns:
+        os.stat_result: EXE 的 stat 结果，供 generate_report() 复用；不存在时返回 None
+    """
+    print_section("验证 EXE 文件")
     
-    if not exe_path.exists():
-        print("❌ 错误: dist/fengbao.exe 不存在")
-        print("\n检查 dist 目录内容:")
+    try:
+        exe_stat = EXE_PATH.stat()
+    except FileNotFoundError:
+        log.error("❌ 错误: dist/fengbao.exe 不存在")
+        log.info("\n检查 dist 目录内容:")
         if os.path.exists('dist'):
             for item in os.listdir('dist'):
-                print(f"  - {item}")
+                log.info(f"  - {item}")
         else:
-            print("  dist 目录不存在")
-        return False
+            log.info("  dist 目录不存在")
+        return None
     
-    print(f"✓ EXE 文件存在: {exe_path}")
+    log.info(f"✓ EXE 文件存在: {EXE_PATH}")
     
     # 检查文件大小
-    size_bytes = exe_path.stat().st_size
+    size_bytes = exe_stat.st_size
     size_mb = size_bytes / (1024 * 1024)
     
-    print(f"✓ 文件大小: {size_mb:.2f} MB ({size_bytes:,} 字节)")
+    log.info(f"✓ 文件大小: {size_mb:.2f} MB ({size_bytes:,} 字节)")
     
     # 评估大小
-    if size_mb < 5:
-        print(f"✓ 优秀! 文件大小 < 5MB")
-    elif size_mb < 10:
-        print(f"✓ 良好! 文件大小 < 10MB")
-    elif size_mb < 20:
-        print(f"⚠️  警告: 文件大小 < 20MB，但超过目标")
-    else:
-        print(f"❌ 文件大小过大 (> 20MB)")
+    log.info(_rate_size(size_mb)[0])
     
-    return True
+    return exe_stat
 
-def generate_report():
-    """生成打包报告"""
+def _list_installed_packages():
+    """列出已安装的包 [(名称, 版本), ...]，按名称排序（直接读取 dist-info，无需启动 pip）"""
+    from importlib.metadata import distributions
+    
+    return sorted(
+        ((dist.metadata['Name'] or '', dist.version) for dist in distributions()),
+        key=lambda item: item[0].lower()
+    )
+
+def prefetch_installed_packages():
+    """在后台线程中提前扫描已安装的包，与打包过程并行"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(_list_installed_packages)
+    executor.shutdown(wait=False)
+    return future
+
+def generate_report(exe_stat=None, packages_future=None):
+    """
+    生成打包报告
+    
+    报告内容边生成边写入文件并同步输出到控制台，不在内存中拼接完整报告。
+    
+    Args:
+        exe_stat: verify_exe() 返回的 stat 结果（None = 构建失败）
+        packages_future: prefetch_installed_packages() 返回的 Future（None = 当场扫描）
+    """
     print_section("生成打包报告")
     
-    report_lines = []
-    report_lines.append("# 打包报告\n")
-    report_lines.append(f"**日期**: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    report_lines.append(f"**Python 版本**: {sys.version}\n")
-    report_lines.append("\n## 构建结果\n")
+    report_path = 'BUILD_REPORT.md'
     
-    exe_path = Path('dist/fengbao.exe')
-    if exe_path.exists():
-        size_bytes = exe_path.stat().st_size
-        size_mb = size_bytes / (1024 * 1024)
+    # 打印摘要（与报告文件内容一致）
+    log.info("\n" + "=" * 60)
+    log.info("  构建摘要")
+    log.info("=" * 60)
+    
+    # 先写入临时文件，完成后再替换，避免中断时留下残缺的报告
+    tmp_path = report_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', buffering=65536) as f:
+        def emit(text):
+            f.write(text)
+            log.info(text.rstrip('\n'))
         
-        report_lines.append(f"- ✅ 构建成功\n")
-        report_lines.append(f"- 文件路径: `{exe_path}`\n")
-        report_lines.append(f"- 文件大小: {size_mb:.2f} MB ({size_bytes:,} 字节)\n")
+        emit("# 打包报告\n")
+        emit(f"**日期**: {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+        emit(f"**Python 版本**: {sys.version}\n")
+        emit("\n## 构建结果\n")
         
-        if size_mb < 5:
-            report_lines.append(f"- 评级: ⭐⭐⭐ 优秀 (< 5MB)\n")
-        elif size_mb < 10:
-            report_lines.append(f"- 评级: ⭐⭐ 良好 (< 10MB)\n")
-        elif size_mb < 20:
-            report_lines.append(f"- 评级: ⭐ 一般 (< 20MB)\n")
+        if exe_stat is not None:
+            size_bytes = exe_stat.st_size
+            size_mb = size_bytes / (1024 * 1024)
+            
+            emit(f"- ✅ 构建成功\n")
+            emit(f"- 文件路径: `{EXE_PATH}`\n")
+            emit(f"- 文件大小: {size_mb:.2f} MB ({size_bytes:,} 字节)\n")
+            emit(_rate_size(size_mb)[1])
         else:
-            report_lines.append(f"- 评级: ❌ 需要优化 (> 20MB)\n")
-    else:
-        report_lines.append(f"- ❌ 构建失败\n")
-    
-    report_lines.append("\n## 依赖列表\n")
-    try:
-        result = subprocess.run(
-            ['pip', 'list'],
-            capture_output=True,
-            text=True
-        )
-        report_lines.append("```\n")
-        report_lines.append(result.stdout)
-        report_lines.append("```\n")
-    except:
-        report_lines.append("无法获取依赖列表\n")
-    
-    report_content = ''.join(report_lines)
-    
-    # 保存报告
-    report_path = 'BUILD_REPORT.md'
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(report_content)
+            emit(f"- ❌ 构建失败\n")
+        
+        emit("\n## 依赖列表\n")
+        try:
+            if packages_future is not None:
+                packages = packages_future.result()
+            else:
+                packages = _list_installed_packages()
+        except Exception:
+            packages = None
+        
+        if packages is not None:
+            emit("```\n")
+            for name, version in packages:
+                emit(f"{name} {version}\n")
+            emit("```\n")
+        else:
+            emit("无法获取依赖列表\n")
     
-    print(f"✓ 报告已保存到: {report_path}")
+    os.replace(tmp_path, report_path)
     
-    # 打印摘要
-    print("\n" + "=" * 60)
-    print("  构建摘要")
-    print("=" * 60)
-    print(report_content)
+    log.info(f"\n✓ 报告已保存到: {report_path}")
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="传奇翎风封包工具 - 本地打包测试")
+    parser.add_argument(
+        '--clean',
+        dest='clean',
+        action='store_true',
+        help="打包前清理 build/、dist/ 和 __pycache__，并禁用 PyInstaller 缓存"
+    )
+    parser.add_argument(
+        '--no-clean',
+        dest='clean',
+        action='store_false',
+        help="增量打包，复用 PyInstaller 缓存（默认）"
+    )
+    parser.add_argument(
+        '--clean-cache',
+        action='store_true',
+        help=f"打包前删除 PyInstaller 工作目录缓存 ({PYI_WORKPATH})"
+    )
+    parser.set_defaults(clean=False)
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """主函数"""
-    print("=" * 60)
-    print("  传奇翎风封包工具 - 本地打包测试")
-    print("  架构: WinDivert + tkinter")
-    print("  目标: EXE < 5MB")
-    print("=" * 60)
+    args = parse_args(argv)
+    setup_logging()
+    
+    # 报告所需的依赖列表与依赖检查、打包并行扫描
+    packages_future = prefetch_installed_packages()
+    
+    log.info("=" * 60)
+    log.info("  传奇翎风封包工具 - 本地打包测试")
+    log.info("  架构: WinDivert + tkinter")
+    log.info("  目标: EXE < 5MB")
+    log.info("=" * 60)
     
     # 1. 检查依赖
     if not check_dependencies():
-        print("\n❌ 依赖检查失败，请先安装缺少的依赖")
+        log.error("\n❌ 依赖检查失败，请先安装缺少的依赖")
         return 1
     
-    # 2. 清理旧文件
-    clean_build()
+    # 2. 清理旧文件（仅在 --clean 时执行，否则保留 build/ 缓存供增量打包）
+    if args.clean:
+        clean_build()
+    else:
+        log.info("\n提示: 增量打包，复用 PyInstaller 缓存（使用 --clean 进行完整打包）")
+    
+    if args.clean_cache:
+        clean_cache()
     
     # 3. 执行打包
-    if not build_exe():
-        print("\n❌ 打包失败")
+    # --clean-cache 表示要重新打包，不复用上次的 EXE
+    if not build_exe(clean=args.clean, force=args.clean_cache):
+        log.error("\n❌ 打包失败")
         return 1
     
     # 4. 验证 EXE
-    if not verify_exe():
-        print("\n❌ EXE 验证失败")
+    exe_stat = verify_exe()
+    if exe_stat is None:
+        log.error("\n❌ EXE 验证失败")
         return 1
     
     # 5. 生成报告
-    generate_report()
-    
-    print("\n" + "=" * 60)
-    print("  ✅ 打包完成!")
-    print("=" * 60)
-    print("\n下一步:")
-    print("  1. 测试 EXE: dist/fengbao.exe")
-    print("  2. 查看报告: BUILD_REPORT.md")
-    print("  3. 如果体积过大，检查 fengbao.spec 的 excludes 配置")
+    generate_report(exe_stat, packages_future)
+    
+    log.info("\n" + "=" * 60)
+    log.info("  ✅ 打包完成!")
+    log.info("=" * 60)
+    log.info("\n下一步:")
+    log.info("  1. 测试 EXE: dist/fengbao.exe")
+    log.info("  2. 查看报告: BUILD_REPORT.md")
+    log.info("  3. 如果体积过大，检查 fengbao.spec 的 excludes 配置")
     
     return 0
 
@@ -9,10 +9,119 @@
 """
 
 import struct
-from typing import List, Tuple, Optional, Dict, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple, Optional, Dict, Any, Union
 from enum import Enum
 
 
+@lru_cache(maxsize=4096)
+def _hex_to_bytes(hex_string: str) -> bytes:
+    """十六进制字符串（可带空格，bytes.fromhex 会跳过字节间的空白）转字节；抓包时相同封包反复出现，缓存转换结果"""
+    return bytes.fromhex(hex_string)
+
+
+def _sequence_from_byte(value: int) -> int:
+    """封包序号字节（ASCII '0'-'9'）转整数，非数字时抛出与 int() 相同的 ValueError"""
+    sequence = value - 0x30
+    if not 0 <= sequence <= 9:
+        raise ValueError(f"invalid literal for int() with base 10: {chr(value)!r}")
+    return sequence
+
+
+def _sequence_to_byte(sequence: int) -> int:
+    """封包序号（0-9）转为ASCII数字字节"""
+    if not 0 <= sequence <= 9:
+        raise ValueError(f"封包序号必须为0-9，当前{sequence}")
+    return sequence + 0x30
+
+
+# 核心16字节数据的打包格式：param1(4) param2(4) 功能码(2) param3(2) param4(2) param5(2)
+_HEADER_STRUCT = struct.Struct('<IIHHHH')
+# 使用物品/放入物品封包：param1(4) param2(4) 功能码(2) param3(4) param4(2)
+_HEADER_ITEM_STRUCT = struct.Struct('<IIHIH')
+
+
+# str.translate 删除表：ASCII 控制字符（0-31 和 127）
+_CONTROL_CHAR_TABLE = dict.fromkeys([*range(32), 127])
+_CONTROL_CHAR_BYTES = bytes([*range(32), 127])
+
+
+def _pad_xor_key(xor_table: List[int], length: int) -> int:
+    """将XOR表补齐（超出部分为 0x3C）或截断到指定长度，返回大端整数形式的密钥"""
+    padded = bytes(xor_table[:length]) + b'\x3c' * (length - len(xor_table))
+    return int.from_bytes(padded, 'big')
+
+
+def _func_code_xor(xor_table: List[int]) -> int:
+    """返回XOR表中功能码位置（偏移8-9，小端）的密钥值，表长度不足时按 0x3C 补齐"""
+    key_int = _pad_xor_key(xor_table, 10)
+    # 长度为10的大端密钥，最低两个字节即为偏移8、9的XOR值
+    return ((key_int >> 8) & 0xFF) | ((key_int & 0xFF) << 8)
+
+
+def _xor_bytes(data: bytes, key_int: int) -> bytes:
+    """整段数据与等长密钥一次性异或（密钥由 _pad_xor_key 生成）"""
+    length = len(data)
+    return (int.from_bytes(data, 'big') ^ key_int).to_bytes(length, 'big')
+
+
+# XOR表映射：功能码 -> XOR表
+XOR_TABLE_MAP = {
+    # 移动相关
+    0x0BC3: [  # 3011 - 移动_旧坐标系
+        0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
+    ],
+    0x0BC5: [  # 3013 - 移动_新坐标系
+        0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
+    ],
+    0x0BC9: [  # 3017 - 使用技能
+        0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
+    ],
+    # 物品相关
+    0x03EE: [  # 1006 - 使用物品
+        0x0F, 0x88, 0x7D, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xD2, 0x3F, 0x70, 0x6A, 0x62, 0x70, 0x68, 0x3C,
+        0x83, 0x82, 0x84, 0x89, 0xF5, 0xCD, 0xBB, 0xE7,
+    ],
+    0x1396: [  # 5014 - 放入物品到对话框
+        0x6A, 0x26, 0x50, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xAA, 0x2F, 0x30, 0x52, 0x40, 0x6C, 0x74, 0x3C,
+        0xF2, 0xE2, 0xD4, 0x9A, 0x89, 0xF8, 0xBE, 0xDA,
+    ],
+    0x1397: [  # 5015 - 从对话框取出物品
+        0x6A, 0x26, 0x50, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
+        0xAA, 0x2F, 0x30, 0x52, 0x40, 0x6C, 0x74, 0x3C,
+        0xF2, 0xE2, 0xD4, 0x9A, 0x89, 0xF8, 0xBE, 0xDA,
+    ],
+    # NPC相关
+    0x03F2: [  # 1010 - 点击NPC
+        0x3C, 0xC6, 0xF8, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
+        0xCE, 0x3F, 0x3F, 0x6E, 0x3C, 0x6C, 0x3C, 0x3C,
+    ],
+    0x03F3: [  # 1011 - NPC对话选项
+        0x3C, 0xC6, 0xF8, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
+        0xCF, 0x3F, 0x3F, 0x6F, 0x3C, 0x6C, 0x3C, 0x3C,
+        0x7C, 0xEB, 0x8C, 0x8D, 0x84, 0xF6, 0xB8, 0x99,
+    ],
+}
+
+# 功能码名称映射
+FUNCTION_NAMES = {
+    0x0BC3: "移动_旧坐标系",
+    0x0BC5: "移动_新坐标系", 
+    0x0BC9: "使用技能",
+    0x03EE: "使用物品",
+    0x1396: "放入物品到对话框",
+    0x1397: "从对话框取出物品",
+    0x03F2: "点击NPC",
+    0x03F3: "NPC对话选项"
+}
+
+
 class PacketType(Enum):
     """封包类型枚举"""
     MOVE = "移动"
@@ -24,6 +133,82 @@ class PacketType(Enum):
     UNKNOWN = "未知"
 
 
+class _DictAccessMixin:
+    """兼容旧版字典结果的读取方式：result['key']、result.get('key')、'key' in result"""
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+    
+    def __contains__(self, key: str) -> bool:
+        return getattr(self, key, None) is not None
+
+
+@dataclass(slots=True)
+class CoreData(_DictAccessMixin):
+    """核心16字节数据"""
+    
+    param1: int          # [0-3]
+    param2: int          # [4-7]
+    function_code: int   # [8-9]
+    param3: int          # [10-11]
+    param4: int          # [12-13]
+    param5: int          # [14-15]
+    
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class ExtendedData(_DictAccessMixin):
+    """扩展数据（第16字节之后）"""
+    
+    length: int
+    raw_bytes: bytes
+    text: Optional[str] = None  # GBK解码后的文本
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class ParsedPacket(_DictAccessMixin):
+    """封包解析结果（解析失败时仅 success/raw_hex/error 及已解析出的字段有值）"""
+    
+    success: bool
+    raw_hex: str
+    error: Optional[str] = None
+    sequence: Optional[int] = None
+    function_code: Optional[int] = None
+    function_name: Optional[str] = None
+    core_data: Optional[CoreData] = None
+    extended_data: Optional[ExtendedData] = None
+    decrypted_hex: Optional[str] = None
+    plaintext: Optional[str] = None
+    
+    @classmethod
+    def failed(cls, raw_hex: str, error: str, sequence: Optional[int] = None) -> 'ParsedPacket':
+        """构建解析失败的结果"""
+        return cls(False, raw_hex, error, sequence)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为旧版字典格式（未解析出的字段省略）"""
+        result = {'success': self.success, 'raw_hex': self.raw_hex, 'error': self.error}
+        for name in self.__slots__[3:]:
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value.to_dict() if isinstance(value, _DictAccessMixin) else value
+        return result
+
+
 class UniversalPacketParser:
     """
     通用封包解析器
@@ -34,65 +219,123 @@ class UniversalPacketParser:
     3. 支持动态添加新的封包类型
     """
     
-    # XOR表映射：功能码 -> XOR表
-    XOR_TABLE_MAP = {
-        # 移动相关
-        0x0BC3: [  # 3011 - 移动_旧坐标系
-            0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
-        ],
-        0x0BC5: [  # 3013 - 移动_新坐标系
-            0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
-        ],
-        0x0BC9: [  # 3017 - 使用技能
-            0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
-        ],
-        # 物品相关
-        0x03EE: [  # 1006 - 使用物品
-            0x0F, 0x88, 0x7D, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xD2, 0x3F, 0x70, 0x6A, 0x62, 0x70, 0x68, 0x3C,
-            0x83, 0x82, 0x84, 0x89, 0xF5, 0xCD, 0xBB, 0xE7,
-        ],
-        0x1396: [  # 5014 - 放入物品到对话框
-            0x6A, 0x26, 0x50, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xAA, 0x2F, 0x30, 0x52, 0x40, 0x6C, 0x74, 0x3C,
-            0xF2, 0xE2, 0xD4, 0x9A, 0x89, 0xF8, 0xBE, 0xDA,
-        ],
-        0x1397: [  # 5015 - 从对话框取出物品
-            0x6A, 0x26, 0x50, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xAA, 0x2F, 0x30, 0x52, 0x40, 0x6C, 0x74, 0x3C,
-            0xF2, 0xE2, 0xD4, 0x9A, 0x89, 0xF8, 0xBE, 0xDA,
-        ],
-        # NPC相关
-        0x03F2: [  # 1010 - 点击NPC
-            0x3C, 0xC6, 0xF8, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
-            0xCE, 0x3F, 0x3F, 0x6E, 0x3C, 0x6C, 0x3C, 0x3C,
-        ],
-        0x03F3: [  # 1011 - NPC对话选项
-            0x3C, 0xC6, 0xF8, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
-            0xCF, 0x3F, 0x3F, 0x6F, 0x3C, 0x6C, 0x3C, 0x3C,
-            0x7C, 0xEB, 0x8C, 0x8D, 0x84, 0xF6, 0xB8, 0x99,
-        ],
-    }
+    # XOR表映射与功能码名称（模块级常量，与 PacketCrypto 共用）
+    XOR_TABLE_MAP = XOR_TABLE_MAP
+    FUNCTION_NAMES = FUNCTION_NAMES
     
-    # 功能码名称映射
-    FUNCTION_NAMES = {
-        0x0BC3: "移动_旧坐标系",
-        0x0BC5: "移动_新坐标系", 
-        0x0BC9: "使用技能",
-        0x03EE: "使用物品",
-        0x1396: "放入物品到对话框",
-        0x1397: "从对话框取出物品",
-        0x03F2: "点击NPC",
-        0x03F3: "NPC对话选项"
-    }
+    # 评分用的功能码分组：移动封包 param1 通常为0，NPC/物品封包 param1 通常不为0
+    MOVE_FUNC_CODES = frozenset({0x0BC3, 0x0BC5, 0x0BC9})
+    TARGET_FUNC_CODES = frozenset({0x03EE, 0x03F2, 0x03F3, 0x1396, 0x1397})
+    
+    # 补齐后的XOR密钥缓存：(功能码, 长度) -> 大整数（超出XOR表的部分用 0x3C 补齐）
+    _xor_key_cache: Dict[Tuple[int, int], int] = {}
+    
+    # 加密后的功能码字节 -> 候选功能码列表（首次使用时根据 XOR_TABLE_MAP 构建）
+    _func_code_index: Dict[int, Tuple[int, ...]] = {}
     
     def __init__(self):
         self.sequence = 1  # 封包序号（1-9循环）
     
-    def parse(self, encrypted_hex: str) -> Dict[str, Any]:
+    @classmethod
+    def _xor_key_int(cls, func_code: int, length: int) -> int:
+        """获取指定长度的XOR密钥（大端整数形式），用于整段数据一次性异或"""
+        cache_key = (func_code, length)
+        key_int = cls._xor_key_cache.get(cache_key)
+        if key_int is None:
+            key_int = _pad_xor_key(cls.XOR_TABLE_MAP[func_code], length)
+            cls._xor_key_cache[cache_key] = key_int
+        return key_int
+    
+    @classmethod
+    def _candidate_func_codes(cls, probe: int) -> Tuple[int, ...]:
+        """
+        根据加密数据第8-9字节（小端）查找可能的功能码
+        
+        加密字节 = 功能码 ^ XOR表[8:10]，因此每个XOR表对应唯一的加密字节值；
+        不同XOR表可能得到相同的值（如 1010/1011），此时返回多个候选（按 XOR_TABLE_MAP 顺序）。
+        """
+        if not cls._func_code_index:
+            index: Dict[int, List[int]] = {}
+            for func_code, xor_table in cls.XOR_TABLE_MAP.items():
+                encrypted_code = func_code ^ _func_code_xor(xor_table)
+                index.setdefault(encrypted_code, []).append(func_code)
+            cls._func_code_index.update(
+                (encrypted_code, tuple(codes)) for encrypted_code, codes in index.items()
+            )
+        return cls._func_code_index.get(probe, ())
+    
+    @classmethod
+    def _score_candidate(cls, func_code: int, decrypted: bytes) -> int:
+        """计算候选解密结果的匹配分数（仅在多个候选时用于区分）"""
+        score = 0
+        
+        # 1. 参数2通常为0（+100分）
+        param2 = int.from_bytes(decrypted[4:8], 'little')
+        if param2 == 0:
+            score += 100
+        
+        # 2. 参数1的合理性
+        param1 = int.from_bytes(decrypted[0:4], 'little')
+        # 移动封包：param1应该为0
+        if func_code in cls.MOVE_FUNC_CODES and param1 == 0:
+            score += 200  # 移动封包特征明显，高分
+        # NPC/物品封包：param1应该不为0
+        elif func_code in cls.TARGET_FUNC_CODES and param1 != 0:
+            score += 50
+        
+        # 3. 参数值的合理范围（避免异常大的数值）
+        if param1 < 0xFFFFFF:  # 参数1小于16M
+            score += 10
+        
+        # 4. XOR表长度（更长的XOR表通常更准确）
+        score += len(cls.XOR_TABLE_MAP[func_code])
+        
+        # 5. 扩展数据的合理性（如果有扩展数据），检查是否有可打印字符
+        if len(decrypted) > 16:
+            ext_data = decrypted[16:24]
+            if ext_data.isascii():
+                # 纯ASCII时GBK解码结果与原字节一一对应，直接统计非控制字符，无需解码
+                printable_count = len(ext_data.translate(None, _CONTROL_CHAR_BYTES))
+            else:
+                text = ext_data.decode('gbk', errors='ignore')
+                printable_count = sum(1 for c in text if c.isprintable())
+            score += printable_count * 5  # 每个可打印字符+5分
+        
+        return score
+    
+    @classmethod
+    def _select_best_candidate(cls, encrypted_data: bytes,
+                               candidate_codes: Tuple[int, ...]) -> Optional[Tuple[int, bytes]]:
+        """
+        对候选XOR表解密并评分，返回得分最高的 (功能码, 解密数据)
+        
+        同分时保留 XOR_TABLE_MAP 中靠前的表；没有候选时返回 None
+        """
+        if not candidate_codes:
+            return None
+        
+        # 整段数据转为大整数，每个XOR表只需一次整数异或
+        data_len = len(encrypted_data)
+        encrypted_int = int.from_bytes(encrypted_data, 'big')
+        
+        # 只有一个候选时无需评分
+        if len(candidate_codes) == 1:
+            func_code = candidate_codes[0]
+            key_int = cls._xor_key_int(func_code, data_len)
+            return func_code, (encrypted_int ^ key_int).to_bytes(data_len, 'big')
+        
+        best = None
+        best_score = -1
+        for func_code in candidate_codes:
+            key_int = cls._xor_key_int(func_code, data_len)
+            decrypted = (encrypted_int ^ key_int).to_bytes(data_len, 'big')
+            score = cls._score_candidate(func_code, decrypted)
+            if score > best_score:
+                best, best_score = (func_code, decrypted), score
+        
+        return best
+    
+    def parse(self, encrypted_hex: str) -> ParsedPacket:
         """
         通用封包解析算法
         
@@ -100,7 +343,7 @@ class UniversalPacketParser:
             encrypted_hex: 加密的十六进制字符串
             
         Returns:
-            解析结果字典：
+            解析结果 ParsedPacket（支持 result['key'] / result.get('key') 读取，to_dict() 转为旧版字典）：
             {
                 'success': bool,              # 是否解析成功
                 'raw_hex': str,               # 原始十六进制
@@ -122,185 +365,142 @@ class UniversalPacketParser:
                 'decrypted_hex': str,         # 解密后的十六进制
                 'plaintext': str,             # 明文格式
             }
+            长度不足、头尾标识错误、无法识别XOR表时返回 success 为 False 的结果。
+            
+        Raises:
+            ValueError: 十六进制格式错误或序号不是数字（需要容错时使用 parse_safe）
         """
-        result = {
-            'success': False,
-            'raw_hex': encrypted_hex,
-            'error': None
-        }
+        return self.parse_bytes(_hex_to_bytes(encrypted_hex), encrypted_hex)
+    
+    def parse_bytes(self, hex_bytes: bytes, raw_hex: Optional[str] = None) -> ParsedPacket:
+        """
+        从原始字节解析封包（抓包时直接使用载荷，省去 字节 -> 十六进制 -> 字节 的转换）
         
-        try:
-            # 1. 验证封包格式
-            hex_bytes = bytes.fromhex(encrypted_hex.replace(" ", ""))
-            
-            if len(hex_bytes) < 19:
-                result['error'] = f"封包长度不足，至少需要19字节，当前{len(hex_bytes)}字节"
-                return result
-            
-            if hex_bytes[0] != 0x23 or hex_bytes[-1] != 0x21:
-                result['error'] = "封包格式错误：头尾标识不匹配（应为 # 和 !）"
-                return result
-            
-            # 2. 提取序号
-            sequence = int(chr(hex_bytes[1]))
-            result['sequence'] = sequence
-            
-            # 3. 提取加密数据
-            encrypted_data = hex_bytes[2:-1]
-            
-            # 4. 智能识别：尝试所有XOR表，找到最合理的匹配
-            candidates = []  # 存储所有可能的匹配 (func_code, xor_table, decrypted_data, score)
-            
-            for test_func_code, xor_table in self.XOR_TABLE_MAP.items():
-                # 尝试用当前XOR表解密
-                temp_decrypt = bytearray()
-                for i in range(len(encrypted_data)):
-                    xor_val = xor_table[i] if i < len(xor_table) else 0x3C
-                    temp_decrypt.append(encrypted_data[i] ^ xor_val)
-                
-                # 检查解密后的功能码
-                if len(temp_decrypt) >= 10:
-                    detected_func_code = struct.unpack('<H', bytes(temp_decrypt[8:10]))[0]
-                    
-                    # 如果检测到的功能码与XOR表对应的功能码匹配
-                    if detected_func_code == test_func_code:
-                        # 计算匹配分数（用于区分多个候选）
-                        score = 0
-                        
-                        # 1. 参数2通常为0（+100分）
-                        param2 = struct.unpack('<I', bytes(temp_decrypt[4:8]))[0]
-                        if param2 == 0:
-                            score += 100
-                        
-                        # 2. 参数1的合理性
-                        param1 = struct.unpack('<I', bytes(temp_decrypt[0:4]))[0]
-                        # 移动封包：param1应该为0
-                        if test_func_code in [0x0BC3, 0x0BC5, 0x0BC9] and param1 == 0:
-                            score += 200  # 移动封包特征明显，高分
-                        # NPC/物品封包：param1应该不为0
-                        elif test_func_code in [0x03EE, 0x03F2, 0x03F3, 0x1396, 0x1397] and param1 != 0:
-                            score += 50
-                        
-                        # 3. 参数值的合理范围（避免异常大的数值）
-                        if param1 < 0xFFFFFF:  # 参数1小于16M
-                            score += 10
-                        
-                        # 4. XOR表长度（更长的XOR表通常更准确）
-                        score += len(xor_table)
-                        
-                        # 5. 扩展数据的合理性（如果有扩展数据）
-                        if len(encrypted_data) > 16:
-                            # 尝试解密扩展数据，检查是否有可打印字符
-                            ext_start = 16
-                            ext_end = min(24, len(temp_decrypt))
-                            ext_data = bytes(temp_decrypt[ext_start:ext_end])
-                            try:
-                                text = ext_data.decode('gbk', errors='ignore')
-                                printable_count = sum(1 for c in text if c.isprintable())
-                                score += printable_count * 5  # 每个可打印字符+5分
-                            except:
-                                pass
-                        
-                        candidates.append((detected_func_code, xor_table, temp_decrypt, score))
-            
-            # 如果没有找到匹配
-            if not candidates:
-                result['error'] = "无法识别封包类型（未找到匹配的XOR表）"
-                return result
+        Args:
+            hex_bytes: 完整封包字节（包含 # 和 !）
+            raw_hex: 原始十六进制字符串（可选，不指定则由字节生成）
             
-            # 选择得分最高的候选
-            candidates.sort(key=lambda x: x[3], reverse=True)
-            func_code, matched_xor_table, decrypted_data, best_score = candidates[0]
-            decrypted_data = bytearray(decrypted_data)
+        Returns:
+            解析结果 ParsedPacket，格式同 parse()
             
-            # 5. 解析核心16字节数据
-            result['function_code'] = func_code
-            result['function_name'] = self.FUNCTION_NAMES.get(func_code, f"未知功能_{func_code}")
+        Raises:
+            ValueError: 序号不是数字
+        """
+        if raw_hex is None:
+            raw_hex = hex_bytes.hex(' ').upper()
+        
+        # 1. 验证封包格式
+        if len(hex_bytes) < 19:
+            return ParsedPacket.failed(
+                raw_hex, f"封包长度不足，至少需要19字节，当前{len(hex_bytes)}字节")
+        
+        if hex_bytes[0] != 0x23 or hex_bytes[-1] != 0x21:
+            return ParsedPacket.failed(raw_hex, "封包格式错误：头尾标识不匹配（应为 # 和 !）")
+        
+        # 2. 提取序号
+        sequence = _sequence_from_byte(hex_bytes[1])
+        
+        # 3. 提取加密数据
+        encrypted_data = hex_bytes[2:-1]
+        
+        # 4. 智能识别：根据加密后的功能码字节直接定位候选XOR表，只解密候选表
+        probe = encrypted_data[8] | (encrypted_data[9] << 8)
+        candidate_codes = self._candidate_func_codes(probe)
+        best = self._select_best_candidate(encrypted_data, candidate_codes)
+        
+        # 如果没有找到匹配
+        if best is None:
+            return ParsedPacket.failed(raw_hex, "无法识别封包类型（未找到匹配的XOR表）", sequence)
+        
+        func_code, decrypted_data = best
+        
+        # 5. 解析核心16字节数据
+        # 正确的参数位置（参考程序验证）：
+        # [0-3]   param1 (4字节)
+        # [4-7]   param2 (4字节)
+        # [8-9]   功能码 (2字节) - 已在上面识别
+        # [10-11] param3 (2字节)
+        # [12-13] param4 (2字节)
+        # [14-15] param5 (2字节)
+        # 一次 unpack_from 直接取出6个整数字段（功能码在 [8:10]）
+        core_data = CoreData(*_HEADER_STRUCT.unpack_from(decrypted_data))
+        
+        # 6. 解析扩展数据（如果有）
+        extended_data = None
+        if len(decrypted_data) > 16:
+            ext_bytes = decrypted_data[16:]
+            text = None
             
-            # 正确的参数位置（参考程序验证）：
-            # [0-3]   param1 (4字节)
-            # [4-7]   param2 (4字节)
-            # [8-9]   功能码 (2字节) - 已在上面识别
-            # [10-11] param3 (2字节)
-            # [12-13] param4 (2字节)
-            # [14-15] param5 (2字节)
-            core_data = {
-                'param1': struct.unpack('<I', bytes(decrypted_data[0:4]))[0],
-                'param2': struct.unpack('<I', bytes(decrypted_data[4:8]))[0],
-                'function_code': func_code,  # 功能码在 [8:10]
-                'param3': struct.unpack('<H', bytes(decrypted_data[10:12]))[0],
-                'param4': struct.unpack('<H', bytes(decrypted_data[12:14]))[0],
-                'param5': struct.unpack('<H', bytes(decrypted_data[14:16]))[0],
-            }
-            result['core_data'] = core_data
+            # 尝试解析为GBK文本：扩展数据从第16字节开始，移除尾部的 0x00 和不可打印字符
+            text_bytes = ext_bytes.rstrip(b'\x00')
             
-            # 6. 解析扩展数据（如果有）
-            if len(decrypted_data) > 16:
-                extended_data = {
-                    'length': len(decrypted_data) - 16,
-                    'raw_bytes': bytes(decrypted_data[16:]),
-                    'text': None
-                }
-                
-                # 尝试解析为GBK文本
-                try:
-                    # 扩展数据从第16字节开始
-                    text_bytes = bytes(decrypted_data[16:])
-                    
-                    # 移除尾部的 0x00 和不可打印字符
-                    text_bytes = text_bytes.rstrip(b'\x00')
-                    
-                    if text_bytes:
-                        # 解码为 GBK
-                        text = text_bytes.decode('gbk', errors='ignore')
-                        
-                        # 清理不可打印字符（保留中文和常见符号）
-                        text = ''.join(c for c in text if c.isprintable() or ord(c) > 127)
-                        
-                        if text:
-                            extended_data['text'] = text
-                except Exception as e:
-                    # 解码失败时，尝试显示十六进制
-                    pass
-                
-                result['extended_data'] = extended_data
+            if text_bytes:
+                # 解码为 GBK（errors='ignore' 不会抛出异常），清理不可打印字符（保留中文和常见符号）
+                text = text_bytes.decode('gbk', errors='ignore').translate(_CONTROL_CHAR_TABLE) or None
             
+            extended_data = ExtendedData(len(ext_bytes), ext_bytes, text)
+        
+        return ParsedPacket(
+            success=True,
+            raw_hex=raw_hex,
+            error=None,
+            sequence=sequence,
+            function_code=func_code,
+            function_name=self.FUNCTION_NAMES.get(func_code, f"未知功能_{func_code}"),
+            core_data=core_data,
+            extended_data=extended_data,
             # 7. 生成解密后的十六进制
-            result['decrypted_hex'] = ' '.join(f'{b:02X}' for b in decrypted_data)
-            
+            decrypted_hex=decrypted_data.hex(' ').upper(),
             # 8. 生成明文格式
-            result['plaintext'] = self._generate_plaintext(core_data, result.get('extended_data'))
-            
-            result['success'] = True
+            plaintext=self._generate_plaintext(core_data, extended_data),
+        )
+    
+    def parse_safe(self, encrypted_hex: str) -> ParsedPacket:
+        """
+        解析封包，捕获所有异常并返回失败结果（兼容旧版 parse 不抛异常的行为）
+        
+        Args:
+            encrypted_hex: 加密的十六进制字符串
             
+        Returns:
+            解析结果 ParsedPacket，异常时 success 为 False，error 为 "解析异常: ..."
+        """
+        try:
+            return self.parse(encrypted_hex)
         except Exception as e:
-            result['error'] = f"解析异常: {str(e)}"
+            return ParsedPacket.failed(encrypted_hex, f"解析异常: {str(e)}")
+    
+    def parse_batch(self, encrypted_hexes: List[str]) -> List[ParsedPacket]:
+        """
+        批量解析封包（用于抓包流等连续封包场景）
         
-        return result
+        Args:
+            encrypted_hexes: 加密的十六进制字符串列表
+        
+        Returns:
+            解析结果列表，顺序与输入一致，格式同 parse_safe()（单个封包异常不影响其他封包）
+        """
+        parse_safe = self.parse_safe
+        return [parse_safe(encrypted_hex) for encrypted_hex in encrypted_hexes]
     
-    def _generate_plaintext(self, core_data: Dict, extended_data: Optional[Dict]) -> str:
+    def _generate_plaintext(self, core_data: CoreData, extended_data: Optional[ExtendedData]) -> str:
         """生成明文格式 - 参考程序格式"""
         # 参考程序格式：发送封包（param1，param2，功能码，param3，param4，文本）
-        params = [
-            core_data['param1'],
-            core_data['param2'],
-            core_data['function_code'],  # 添加功能码
-            core_data['param3'],
-            core_data['param4']
-        ]
-        
         # 扩展数据（文本）
-        if extended_data and extended_data.get('text'):
-            params.append(extended_data['text'])
+        if extended_data is not None and extended_data.text:
+            return (f"发送封包（{core_data.param1}，{core_data.param2}，"
+                    f"{core_data.function_code}，{core_data.param3}，{core_data.param4}，"
+                    f"{extended_data.text}，）")
         
-        return f"发送封包（{('，'.join(map(str, params)))}，）"
+        return (f"发送封包（{core_data.param1}，{core_data.param2}，"
+                f"{core_data.function_code}，{core_data.param3}，{core_data.param4}，）")
     
-    def reconstruct(self, parsed_data: Dict, sequence: Optional[int] = None) -> Tuple[str, str]:
+    def reconstruct(self, parsed_data: Union[ParsedPacket, Dict], sequence: Optional[int] = None) -> Tuple[str, str]:
         """
         通用封包重构算法
         
         Args:
-            parsed_data: parse()返回的解析结果
+            parsed_data: parse()返回的解析结果，或同结构的字典
             sequence: 封包序号（可选）
             
         Returns:
@@ -319,39 +519,39 @@ class UniversalPacketParser:
             raise ValueError(f"未知功能码: {func_code}")
         
         # 构建原始数据
-        data = bytearray()
-        data.extend(struct.pack('<I', core_data['param1']))
-        data.extend(struct.pack('<I', core_data['param2']))
-        data.extend(struct.pack('<H', func_code))
-        data.extend(struct.pack('<H', core_data['param3']))
-        data.extend(struct.pack('<H', core_data['param4']))
-        data.extend(struct.pack('<H', core_data['param5']))
+        data = bytearray(_HEADER_STRUCT.pack(
+            core_data['param1'], core_data['param2'], func_code,
+            core_data['param3'], core_data['param4'], core_data['param5']
+        ))
         
-        # 添加扩展数据
-        if extended_data and extended_data.get('text'):
-            data.extend(extended_data['text'].encode('gbk'))
+        # 添加扩展数据（优先使用 parse 保留的原始字节，避免GBK解码/重新编码）
+        if extended_data:
+            if extended_data.get('raw_bytes') is not None:
+                data.extend(extended_data['raw_bytes'].rstrip(b'\x00'))
+            elif extended_data.get('text'):
+                data.extend(extended_data['text'].encode('gbk'))
         
         # 填充到至少22字节
-        while len(data) < 22:
-            data.append(0x00)
+        if len(data) < 22:
+            data.extend(bytes(22 - len(data)))
         
         # 加密
         if sequence is None:
             sequence = self.sequence
             self.sequence = (self.sequence % 9) + 1
         
-        encrypted = bytearray()
-        encrypted.append(0x23)  # #
-        encrypted.append(ord(str(sequence)))
+        # 按最终长度预分配：# + 序号 + 加密数据 + !
+        encrypted = bytearray(len(data) + 3)
+        encrypted[0] = 0x23  # #
+        encrypted[1] = _sequence_to_byte(sequence)
         
-        for i, byte in enumerate(data):
-            xor_val = xor_table[i] if i < len(xor_table) else 0x3C
-            encrypted.append(byte ^ xor_val)
+        # 整段数据一次性异或（与 parse 共用补齐后的XOR密钥缓存）
+        encrypted[2:-1] = _xor_bytes(data, self._xor_key_int(func_code, len(data)))
         
-        encrypted.append(0x21)  # !
+        encrypted[-1] = 0x21  # !
         
         ascii_format = encrypted.decode('latin-1')
-        hex_format = ' '.join(f'{b:02X}' for b in encrypted)
+        hex_format = encrypted.hex(' ').upper()
         
         return ascii_format, hex_format
     
@@ -365,6 +565,8 @@ class UniversalPacketParser:
             func_name: 功能名称（可选）
         """
         self.XOR_TABLE_MAP[func_code] = xor_table
+        self._xor_key_cache.clear()
+        self._func_code_index.clear()
         if func_name:
             self.FUNCTION_NAMES[func_code] = func_name
     
@@ -379,25 +581,20 @@ class UniversalPacketParser:
         Returns:
             XOR表
         """
-        enc_bytes = bytes.fromhex(encrypted_hex.replace(" ", ""))
-        dec_bytes = bytes.fromhex(decrypted_hex.replace(" ", ""))
+        enc_bytes = _hex_to_bytes(encrypted_hex)
+        dec_bytes = _hex_to_bytes(decrypted_hex)
         
         # 跳过头部的 # 和序号，以及尾部的 !
         enc_data = enc_bytes[2:-1]
         
         # 如果解密数据较短，只提取对应长度的XOR表
+        # （加密数据更长时，扩展部分的原始数据未知，反推的XOR值不准确，所以只返回已知部分）
         min_len = min(len(enc_data), len(dec_bytes))
         
-        xor_table = [enc_data[i] ^ dec_bytes[i] for i in range(min_len)]
+        # 两段数据一次性整数异或，得到XOR表
+        xor_bytes = _xor_bytes(enc_data[:min_len], int.from_bytes(dec_bytes[:min_len], 'big'))
         
-        # 如果加密数据更长，剩余部分假设使用 0x3C
-        if len(enc_data) > len(dec_bytes):
-            for i in range(len(dec_bytes), len(enc_data)):
-                # 假设扩展部分的原始数据为 0x00，可以反推XOR值
-                # 但这不准确，所以只返回已知部分
-                pass
-        
-        return xor_table
+        return list(xor_bytes)
 
 
 class PacketCrypto:
@@ -405,24 +602,11 @@ class PacketCrypto:
     
     # 不同操作类型的XOR密钥表
     XOR_TABLES = {
-        PacketType.MOVE: [
-            0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xF9, 0x37, 0x58, 0x41, 0x3D, 0x72, 0x0E, 0x3C,
-        ],
-        PacketType.ITEM: [
-            0x0F, 0x88, 0x7D, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xD2, 0x3F, 0x70, 0x6A, 0x62, 0x70, 0x68, 0x3C,
-            0x83, 0x82, 0x84, 0x89, 0xF5, 0xCD, 0xBB, 0xE7,  # 扩展部分（中文等）
-        ],
-        PacketType.ITEM_TO_DIALOG: [
-            0x6A, 0x26, 0x50, 0x3C, 0x3C, 0x3C, 0x3C, 0x3C,
-            0xAA, 0x2F, 0x30, 0x52, 0x40, 0x6C, 0x74, 0x3C,
-            0xF2, 0xE2, 0xD4, 0x9A, 0x89, 0xF8, 0xBE, 0xDA,  # 扩展部分（中文等）
-        ],
-        PacketType.NPC_CLICK: [
-            0x3C, 0xC6, 0xF8, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
-            0xCE, 0x3F, 0x3F, 0x6E, 0x3C, 0x6C, 0x3C, 0x3C,
-        ],
+        PacketType.MOVE: XOR_TABLE_MAP[0x0BC3],
+        PacketType.ITEM: XOR_TABLE_MAP[0x03EE],
+        PacketType.ITEM_TO_DIALOG: XOR_TABLE_MAP[0x1396],
+        PacketType.NPC_CLICK: XOR_TABLE_MAP[0x03F2],
+        # 注意：旧版NPC对话表前3字节与 XOR_TABLE_MAP[0x03F3] 不同，单独保留
         PacketType.NPC_DIALOG: [
             0x0C, 0x20, 0xCC, 0x77, 0x3F, 0x4C, 0x3C, 0x3C,
             0xCF, 0x3F, 0x3F, 0x6F, 0x3C, 0x6C, 0x3C, 0x3C,
@@ -442,46 +626,55 @@ class PacketCrypto:
         0x03F3: PacketType.NPC_DIALOG,     # 1011
     }
     
-    # 功能码名称映射
-    FUNCTION_NAMES = {
-        0x0BC3: "移动_旧坐标系",
-        0x0BC5: "移动_新坐标系", 
-        0x0BC9: "使用技能",
-        0x03EE: "使用物品",
-        0x1396: "放入物品到对话框",
-        0x1397: "从对话框取出物品",
-        0x03F2: "点击NPC",
-        0x03F3: "NPC对话选项"
-    }
+    # 功能码名称映射（与 UniversalPacketParser 共用）
+    FUNCTION_NAMES = FUNCTION_NAMES
+    
+    # 补齐后的XOR密钥缓存：(封包类型, 长度) -> 大整数
+    _xor_key_cache: Dict[Tuple[PacketType, int], int] = {}
+    
+    # 各封包类型功能码位置（偏移8-9）的XOR密钥，首次使用时构建
+    _func_code_keys: Dict[PacketType, int] = {}
     
     def __init__(self):
         self.sequence = 1  # 封包序号（1-9循环）
     
+    @classmethod
+    def _xor_key_int(cls, packet_type: PacketType, length: int) -> int:
+        """获取指定封包类型、指定长度的XOR密钥（未知类型使用移动封包的XOR表）"""
+        cache_key = (packet_type, length)
+        key_int = cls._xor_key_cache.get(cache_key)
+        if key_int is None:
+            xor_table = cls.XOR_TABLES.get(packet_type, cls.XOR_TABLES[PacketType.MOVE])
+            key_int = _pad_xor_key(xor_table, length)
+            cls._xor_key_cache[cache_key] = key_int
+        return key_int
+    
+    @classmethod
+    def _func_code_key(cls, packet_type: PacketType) -> int:
+        """获取功能码两个字节（偏移8-9，小端）对应的XOR密钥"""
+        if not cls._func_code_keys:
+            for ptype, xor_table in cls.XOR_TABLES.items():
+                cls._func_code_keys[ptype] = _func_code_xor(xor_table)
+        return cls._func_code_keys[packet_type]
+    
     def auto_detect_type(self, encrypted_hex: str) -> PacketType:
         """
         自动检测封包类型（尝试用所有XOR表解密，看哪个合理）
         """
-        hex_bytes = bytes.fromhex(encrypted_hex.replace(" ", ""))
+        hex_bytes = _hex_to_bytes(encrypted_hex)
         encrypted_data = hex_bytes[2:-1]
         
-        for ptype, xor_table in self.XOR_TABLES.items():
-            try:
-                # 尝试解密
-                decrypted = bytearray()
-                for i, enc_byte in enumerate(encrypted_data[:16]):
-                    if i < len(xor_table):
-                        decrypted.append(enc_byte ^ xor_table[i])
-                    else:
-                        decrypted.append(enc_byte ^ 0x3C)
-                
-                # 检查功能码是否合理
-                if len(decrypted) >= 10:
-                    func_code = struct.unpack('<H', bytes(decrypted[8:10]))[0]
-                    expected_type = self.FUNC_CODE_TO_TYPE.get(func_code)
-                    if expected_type == ptype:
-                        return ptype
-            except:
-                continue
+        if len(encrypted_data) < 10:
+            return PacketType.UNKNOWN
+        
+        # 只需解密功能码所在的两个字节即可判断类型
+        probe = encrypted_data[8] | (encrypted_data[9] << 8)
+        
+        for ptype in self.XOR_TABLES:
+            # 检查功能码是否合理
+            func_code = probe ^ self._func_code_key(ptype)
+            if self.FUNC_CODE_TO_TYPE.get(func_code) == ptype:
+                return ptype
         
         return PacketType.UNKNOWN
     
@@ -496,7 +689,7 @@ class PacketCrypto:
         Returns:
             (解密后的字节数据, 明文参数列表, 封包类型)
         """
-        hex_bytes = bytes.fromhex(encrypted_hex.replace(" ", ""))
+        hex_bytes = _hex_to_bytes(encrypted_hex)
         
         if len(hex_bytes) < 19:
             raise ValueError(f"封包长度不足，至少需要19字节，当前{len(hex_bytes)}字节")
@@ -506,31 +699,20 @@ class PacketCrypto:
             raise ValueError("封包格式错误：头尾标识不匹配")
         
         # 提取序号
-        sequence = int(chr(hex_bytes[1]))
+        sequence = _sequence_from_byte(hex_bytes[1])
         
         # 自动检测封包类型
         if packet_type is None:
             packet_type = self.auto_detect_type(encrypted_hex)
         
-        # 获取对应的XOR表
-        xor_table = self.XOR_TABLES.get(packet_type, self.XOR_TABLES[PacketType.MOVE])
-        
-        # 解密数据部分
+        # 解密数据部分（使用对应类型的XOR表）
         encrypted_data = hex_bytes[2:-1]
-        decrypted = bytearray()
-        
-        for i, enc_byte in enumerate(encrypted_data):
-            if i < len(xor_table):
-                xor_val = xor_table[i]
-            else:
-                xor_val = 0x3C
-            
-            decrypted.append(enc_byte ^ xor_val)
+        decrypted = _xor_bytes(encrypted_data, self._xor_key_int(packet_type, len(encrypted_data)))
         
         # 解析明文参数
-        params = self._parse_params(bytes(decrypted), packet_type)
+        params = self._parse_params(decrypted, packet_type)
         
-        return bytes(decrypted), params, packet_type
+        return decrypted, params, packet_type
     
     def _parse_params(self, data: bytes, packet_type: PacketType) -> List:
         """
@@ -544,28 +726,28 @@ class PacketCrypto:
         params = []
         
         # 参数1：4字节整数
-        param1 = struct.unpack('<I', data[0:4])[0]
+        param1 = int.from_bytes(data[0:4], 'little')
         params.append(param1)
         
         # 参数2：4字节整数
-        param2 = struct.unpack('<I', data[4:8])[0]
+        param2 = int.from_bytes(data[4:8], 'little')
         params.append(param2)
         
         # 功能码：2字节
-        func_code = struct.unpack('<H', data[8:10])[0]
+        func_code = int.from_bytes(data[8:10], 'little')
         params.append(func_code)
         
         # 根据封包类型解析后续参数
         if packet_type in [PacketType.ITEM, PacketType.ITEM_TO_DIALOG]:
             # 使用物品/放入物品：param3(4字节) + param4(2字节)
-            param3 = struct.unpack('<I', data[10:14])[0]
-            param4 = struct.unpack('<H', data[14:16])[0]
+            param3 = int.from_bytes(data[10:14], 'little')
+            param4 = int.from_bytes(data[14:16], 'little')
             params.extend([param3, param4])
         else:
             # 其他类型：param3-5各2字节
-            param3 = struct.unpack('<H', data[10:12])[0]
-            param4 = struct.unpack('<H', data[12:14])[0]
-            param5 = struct.unpack('<H', data[14:16])[0]
+            param3 = int.from_bytes(data[10:12], 'little')
+            param4 = int.from_bytes(data[12:14], 'little')
+            param5 = int.from_bytes(data[14:16], 'little')
             params.extend([param3, param4, param5])
         
         # 扩展数据：中文字符串（GBK编码）
@@ -582,8 +764,10 @@ class PacketCrypto:
                 if extra_data:
                     # 尝试解码为GBK
                     text = extra_data.decode('gbk', errors='ignore')
-                    # 移除不可打印字符
-                    text = ''.join(c for c in text if c.isprintable())
+                    # 移除不可打印字符（先整体删除ASCII控制字符，仍有其他不可打印字符时再逐个过滤）
+                    text = text.translate(_CONTROL_CHAR_TABLE)
+                    if not text.isprintable():
+                        text = ''.join(c for c in text if c.isprintable())
                     if text:
                         params.append(text)
             except:
@@ -609,27 +793,14 @@ class PacketCrypto:
             sequence = self.sequence
             self.sequence = (self.sequence % 9) + 1
         
-        # 构建原始数据（16字节基础）
-        data = bytearray()
-        
-        # 参数1-2：各4字节
-        data.extend(struct.pack('<I', params[0]))
-        data.extend(struct.pack('<I', params[1]))
-        
-        # 功能码：2字节
-        data.extend(struct.pack('<H', params[2]))
-        
-        # 根据封包类型构建后续参数
+        # 构建原始数据（16字节基础）：参数1-2各4字节，功能码2字节，后续参数按封包类型区分
         if packet_type in [PacketType.ITEM, PacketType.ITEM_TO_DIALOG]:
             # 使用物品/放入物品：param3(4字节) + param4(2字节)
-            data.extend(struct.pack('<I', params[3]))
-            data.extend(struct.pack('<H', params[4]))
+            data = bytearray(_HEADER_ITEM_STRUCT.pack(*params[:5]))
             extra_text_idx = 5
         else:
             # 其他类型：param3-5各2字节
-            data.extend(struct.pack('<H', params[3]))
-            data.extend(struct.pack('<H', params[4]))
-            data.extend(struct.pack('<H', params[5]))
+            data = bytearray(_HEADER_STRUCT.pack(*params[:6]))
             extra_text_idx = 6
         
         # 扩展数据：中文字符串
@@ -638,30 +809,19 @@ class PacketCrypto:
         
         # 填充到至少22字节（移动和NPC封包需要）
         if packet_type in [PacketType.MOVE, PacketType.NPC_CLICK, PacketType.NPC_DIALOG]:
-            while len(data) < 22:
-                data.append(0x00)
-        
-        # 获取对应的XOR表
-        xor_table = self.XOR_TABLES.get(packet_type, self.XOR_TABLES[PacketType.MOVE])
-        
-        # 加密数据
-        encrypted = bytearray()
-        encrypted.append(0x23)  # 头：#
-        encrypted.append(ord(str(sequence)))  # 序号
-        
-        for i, byte in enumerate(data):
-            if i < len(xor_table):
-                xor_val = xor_table[i]
-            else:
-                xor_val = 0x3C
-            
-            encrypted.append(byte ^ xor_val)
+            if len(data) < 22:
+                data.extend(bytes(22 - len(data)))
         
-        encrypted.append(0x21)  # 尾：!
+        # 加密数据（使用对应类型的XOR表）
+        encrypted = bytearray(len(data) + 3)  # 按最终长度预分配
+        encrypted[0] = 0x23  # 头：#
+        encrypted[1] = _sequence_to_byte(sequence)  # 序号
+        encrypted[2:-1] = _xor_bytes(data, self._xor_key_int(packet_type, len(data)))
+        encrypted[-1] = 0x21  # 尾：!
         
         # 生成两种格式
         ascii_format = encrypted.decode('latin-1')
-        hex_format = ' '.join(f'{b:02X}' for b in encrypted)
+        hex_format = encrypted.hex(' ').upper()
         
         return ascii_format, hex_format
     
@@ -742,7 +902,7 @@ def test_crypto():
             print(f"功能名称: {func_name}")
             
             # 反向加密验证
-            seq = int(chr(bytes.fromhex(test['hex'].replace(" ", ""))[1]))
+            seq = bytes.fromhex(test['hex'].replace(" ", ""))[1] - 0x30
             ascii_enc, hex_enc = crypto.encrypt_packet(params, test['type'], sequence=seq)
             print(f"重新加密: {hex_enc}")
             
@@ -825,7 +985,7 @@ def test_universal_parser():
             print(f"  功能码: {result['function_code']} (0x{result['function_code']:04X})")
             print(f"  功能名称: {result['function_name']}")
             print(f"\n  核心数据:")
-            for key, value in result['core_data'].items():
+            for key, value in result['core_data'].to_dict().items():
                 print(f"    {key}: {value}")
             
             if 'extended_data' in result:
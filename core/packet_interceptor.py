@@ -8,6 +8,9 @@
 - 体积小 (2MB vs Scapy 20MB)
 """
 
+import os
+import queue
+import sys
 import threading
 import time
 from datetime import datetime
@@ -21,6 +24,26 @@ except ImportError:
     HAS_WINDIVERT = False
     print("警告: pydivert 未安装，请运行: pip install pydivert")
 
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    THREAD_PRIORITY_ABOVE_NORMAL = 1
+    
+    # 声明参数和返回值类型（句柄、亲和性掩码均为指针宽度）
+    kernel32.GetCurrentThread.argtypes = []
+    kernel32.GetCurrentThread.restype = wintypes.HANDLE
+    kernel32.SetThreadPriority.argtypes = [wintypes.HANDLE, ctypes.c_int]
+    kernel32.SetThreadPriority.restype = wintypes.BOOL
+    kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+    kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+
 
 class PacketInterceptor:
     """
@@ -33,7 +56,12 @@ class PacketInterceptor:
     - 统计信息记录
     """
     
-    def __init__(self, target_pid=None, target_port=None, callback=None):
+    # 目标进程本地端口的刷新间隔（秒），端口变化时按新端口重新打开 WinDivert
+    PORT_REFRESH_INTERVAL = 3.0
+    # 解析队列容量：解析或回调跟不上时丢弃新封包（仍已转发，只是不显示），避免内存无限增长
+    PARSE_QUEUE_SIZE = 10000
+    
+    def __init__(self, target_pid=None, target_port=None, callback=None, magic_byte=0x23, reader_core=None):
         """
         初始化拦截器
         
@@ -41,6 +69,8 @@ class PacketInterceptor:
             target_pid: 目标进程 PID (None = 全局模式)
             target_port: 目标端口 (None = 所有端口)
             callback: 回调函数 callback(packet_data)
+            magic_byte: 游戏封包首字节（默认 0x23 即 #），首字节不符的载荷不进入解析器
+            reader_core: 拦截线程绑定的 CPU 核心编号（None = 最后一个核心）
         """
         if not HAS_WINDIVERT:
             raise ImportError("需要安装 pydivert: pip install pydivert")
@@ -48,11 +78,25 @@ class PacketInterceptor:
         self.target_pid = target_pid
         self.target_port = target_port
         self.callback = callback
+        self.magic_byte = magic_byte
+        self.reader_core = reader_core
         
         self.running = False
         self.thread = None
         
-        # 统计信息
+        # 当前 WinDivert 句柄及写入过滤规则的目标进程本地端口（端口刷新线程与拦截线程共享）
+        self._divert = None
+        self._divert_lock = threading.Lock()
+        self._pid_ports = []
+        self._port_thread = None
+        
+        # 解析队列与解析线程：拦截线程转发封包后只负责入队，解析和回调在解析线程中完成
+        self._parse_queue = None
+        self._parse_thread = None
+        
+        # 统计信息：每个计数只由一个线程写入，无需加锁
+        # 拦截线程: total / rejected（首尾字节或长度不符）/ dropped（解析队列已满）
+        # 解析线程: parsed / parse_failed
         self.stats = defaultdict(int)
         self.start_time = None
         
@@ -76,58 +120,162 @@ class PacketInterceptor:
         self.running = True
         self.start_time = datetime.now()
         
+        # 启动解析线程（单线程消费，保证回调顺序与抓包顺序一致）
+        # 本次启动的线程都持有这一个队列的引用，上次未退出的拦截线程不会写入新队列
+        parse_queue = self._parse_queue = queue.Queue(maxsize=self.PARSE_QUEUE_SIZE)
+        self._parse_thread = threading.Thread(target=self._parse_loop, args=(parse_queue,), daemon=True)
+        self._parse_thread.start()
+        
         # 启动拦截线程
-        self.thread = threading.Thread(target=self._intercept_loop, daemon=True)
+        self.thread = threading.Thread(target=self._intercept_loop, args=(parse_queue,), daemon=True)
         self.thread.start()
+        
+        # 启动端口刷新线程（游戏重连后本地端口会变化）
+        if self.target_pid and HAS_PSUTIL:
+            self._port_thread = threading.Thread(target=self._port_watch_loop, daemon=True)
+            self._port_thread.start()
     
     def stop(self):
         """停止拦截器"""
         self.running = False
+        # 关闭 WinDivert 句柄，唤醒阻塞在 recv 中的拦截线程
+        divert = self._divert
+        if divert is not None:
+            self._close_divert(divert)
         if self.thread:
             self.thread.join(timeout=2.0)
+        if self._parse_thread:
+            # 放入结束标记，解析线程处理完已入队的封包后退出
+            self._put_parse_sentinel(self._parse_queue)
+            self._parse_thread.join(timeout=2.0)
     
-    def _intercept_loop(self):
-        """拦截循环（在独立线程中运行）"""
+    @staticmethod
+    def _put_parse_sentinel(parse_queue):
+        """向解析队列放入结束标记（队列已满时等待解析线程腾出空间，超时则放弃）"""
         try:
-            # 构建过滤规则
-            # 注意：WinDivert 的 processId 过滤在某些情况下不可靠
-            # 我们使用 TCP 过滤，然后在应用层根据 PID 过滤
-            filter_parts = ["tcp"]
+            parse_queue.put(None, timeout=2.0)
+        except queue.Full:
+            pass
+    
+    def _boost_current_thread(self):
+        """
+        提升当前线程（拦截线程）的调度优先级，并绑定到 reader_core 指定的 CPU 核心（默认最后一个），
+        避免与 UI 线程争抢同一核心导致转发延迟抖动。设置失败时忽略。
+        """
+        cpu_count = os.cpu_count() or 1
+        if cpu_count < 2:
+            return
+        
+        core = cpu_count - 1 if self.reader_core is None else self.reader_core
+        if not 0 <= core < cpu_count:
+            print(f"[拦截器] 无效的 CPU 核心编号: {core}（共 {cpu_count} 个核心），不绑定核心")
+            core = None
+        
+        try:
+            if sys.platform == 'win32':
+                # GetCurrentThread 返回当前线程的伪句柄，无需 OpenThread/CloseHandle
+                handle = kernel32.GetCurrentThread()
+                kernel32.SetThreadPriority(handle, THREAD_PRIORITY_ABOVE_NORMAL)
+                if core is not None:
+                    kernel32.SetThreadAffinityMask(handle, ctypes.c_size_t(1 << core))
+            elif core is not None and hasattr(os, 'sched_setaffinity'):
+                # Linux 下 pid=0 表示调用线程
+                os.sched_setaffinity(0, {core})
+        except Exception as e:
+            print(f"[拦截器] 设置线程优先级/CPU 亲和性失败: {e}")
+    
+    def _get_pid_local_ports(self, pid, report_errors=True):
+        """
+        获取进程当前 TCP 连接的本地端口（需要 psutil）
+        
+        Args:
+            pid: 进程 PID
+            report_errors: 获取失败时是否打印错误
+        
+        Returns:
+            list: 本地端口列表（升序），无法获取时返回空列表
+        """
+        if not HAS_PSUTIL:
+            return []
+        
+        try:
+            connections = psutil.Process(pid).connections(kind='tcp')
+        except (psutil.Error, OSError) as e:
+            if report_errors:
+                print(f"[拦截器] 获取进程连接失败: {e}")
+            return []
+        
+        return sorted({conn.laddr.port for conn in connections if conn.laddr})
+    
+    def _port_watch_loop(self):
+        """端口刷新循环（在独立线程中运行）：目标进程本地端口变化时关闭当前句柄，由拦截线程按新端口重新打开"""
+        while self.running:
+            time.sleep(self.PORT_REFRESH_INTERVAL)
+            if not self.running:
+                break
             
-            if self.target_port:
-                filter_parts.append(f"(tcp.DstPort == {self.target_port} or tcp.SrcPort == {self.target_port})")
+            ports = self._get_pid_local_ports(self.target_pid, report_errors=False)
+            if ports == self._pid_ports:
+                continue
             
-            filter_str = " and ".join(filter_parts)
+            print(f"[拦截器] 目标进程本地端口变化: {self._pid_ports} → {ports}")
+            if not ports:
+                print(f"[拦截器] 警告: 进程 {self.target_pid} 当前没有 TCP 连接，改为应用层 PID 过滤")
+            self._pid_ports = ports
             
-            print(f"[拦截器] 过滤规则: {filter_str}")
+            divert = self._divert
+            if divert is not None:
+                self._close_divert(divert)
+    
+    def _close_divert(self, divert):
+        """关闭 WinDivert 句柄（拦截线程、端口刷新线程和 stop() 都可能调用，只关闭一次）"""
+        with self._divert_lock:
+            if divert.is_open:
+                divert.close()
+    
+    def _build_filter(self, pid_ports):
+        """
+        构建 WinDivert 过滤规则
+        
+        Args:
+            pid_ports: 目标进程的本地端口（为空时不按端口过滤）
+        """
+        filter_parts = ["tcp"]
+        
+        if self.target_port:
+            filter_parts.append(f"(tcp.DstPort == {self.target_port} or tcp.SrcPort == {self.target_port})")
+        
+        if pid_ports:
+            filter_parts.append("(" + " or ".join(
+                f"tcp.SrcPort == {port} or tcp.DstPort == {port}" for port in pid_ports
+            ) + ")")
+        
+        return " and ".join(filter_parts)
+    
+    def _intercept_loop(self, parse_queue):
+        """
+        拦截循环（在独立线程中运行）
+        
+        Args:
+            parse_queue: 本次启动创建的解析队列
+        """
+        self._boost_current_thread()
+        
+        try:
+            # 注意：WinDivert 的 processId 过滤在某些情况下不可靠
+            # 指定 PID 时先把进程当前连接的本地端口写入过滤规则，由驱动丢弃无关封包；
+            # 无法获取端口时使用 TCP 过滤，然后在应用层根据 PID 过滤
             if self.target_pid:
-                print(f"[拦截器] 目标进程 PID: {self.target_pid} (应用层过滤)")
+                self._pid_ports = self._get_pid_local_ports(self.target_pid)
+                if not self._pid_ports:
+                    print(f"[拦截器] 警告: 未找到进程 {self.target_pid} 的 TCP 连接，改为应用层 PID 过滤")
             
-            # 打开 WinDivert
-            with pydivert.WinDivert(filter_str) as w:
-                print("[拦截器] WinDivert 驱动已加载")
-                print("[拦截器] 开始拦截封包...")
-                
-                for packet in w:
-                    if not self.running:
-                        break
-                    
-                    try:
-                        # 如果指定了 PID，在应用层过滤
-                        if self.target_pid:
-                            # 获取封包的进程 ID
-                            packet_pid = getattr(packet, 'process_id', None)
-                            
-                            # 如果无法获取 PID 或 PID 不匹配，直接转发
-                            if packet_pid is None or packet_pid != self.target_pid:
-                                w.send(packet)
-                                continue
-                        
-                        self._handle_packet(packet, w)
-                    except Exception as e:
-                        print(f"[拦截器] 处理封包错误: {e}")
-                        # 出错时仍然转发封包，避免中断连接
-                        w.send(packet)
+            # 端口刷新线程发现端口变化时会关闭句柄，这里按新端口重新打开
+            while self.running:
+                pid_ports = self._pid_ports
+                self._run_divert(pid_ports, parse_queue)
+                if self._pid_ports == pid_ports:
+                    break
         
         except PermissionError:
             print("[拦截器] 错误: 需要管理员权限!")
@@ -137,64 +285,148 @@ class PacketInterceptor:
             traceback.print_exc()
         finally:
             self.running = False
+            self._put_parse_sentinel(parse_queue)
     
-    def _handle_packet(self, packet, divert_handle):
+    def _run_divert(self, pid_ports, parse_queue):
+        """
+        按给定端口打开 WinDivert 并拦截，直到停止或句柄被关闭
+        
+        Args:
+            pid_ports: 写入过滤规则的目标进程本地端口
+            parse_queue: 解析队列
+        """
+        filter_str = self._build_filter(pid_ports)
+        
+        print(f"[拦截器] 过滤规则: {filter_str}")
+        if self.target_pid:
+            if pid_ports:
+                print(f"[拦截器] 目标进程 PID: {self.target_pid} (驱动层过滤，本地端口: {pid_ports})")
+            else:
+                print(f"[拦截器] 目标进程 PID: {self.target_pid} (应用层过滤)")
+        
+        # 打开 WinDivert
+        w = pydivert.WinDivert(filter_str)
+        w.open()
+        self._divert = w
+        try:
+            # 打开期间端口已变化或已停止：关闭后由调用方处理
+            if not self.running or self._pid_ports != pid_ports:
+                return
+            
+            print("[拦截器] WinDivert 驱动已加载")
+            print("[拦截器] 开始拦截封包...")
+            
+            # 循环内频繁使用的属性和方法提前绑定到局部变量，减少每个封包的属性查找
+            # 转发的封包未被修改，校验和仍然有效，转发时跳过校验和重算
+            send = w.send
+            handle_packet = self._handle_packet
+            # 端口已写入过滤规则时无需再在应用层按 PID 过滤
+            target_pid = None if pid_ports else self.target_pid
+            
+            for packet in w:
+                if not self.running:
+                    break
+                
+                try:
+                    # 如果指定了 PID，在应用层过滤
+                    if target_pid:
+                        # 获取封包的进程 ID
+                        packet_pid = getattr(packet, 'process_id', None)
+                        
+                        # 如果无法获取 PID 或 PID 不匹配，直接转发
+                        if packet_pid is None or packet_pid != target_pid:
+                            send(packet, recalculate_checksum=False)
+                            continue
+                    
+                    handle_packet(packet, w, parse_queue)
+                except Exception as e:
+                    print(f"[拦截器] 处理封包错误: {e}")
+                    # 出错时仍然转发封包，避免中断连接
+                    send(packet, recalculate_checksum=False)
+        except (OSError, RuntimeError):
+            # 句柄被端口刷新线程或 stop() 关闭时 recv/send 失败，属于正常结束
+            if self.running and self._pid_ports == pid_ports:
+                raise
+        finally:
+            if self._divert is w:
+                self._divert = None
+            self._close_divert(w)
+    
+    def _handle_packet(self, packet, divert_handle, parse_queue):
         """
         处理单个封包
         
         Args:
             packet: WinDivert 封包对象
             divert_handle: WinDivert 句柄（用于转发）
+            parse_queue: 解析队列
         """
         self.stats['total'] += 1
         
-        # 判断方向
-        is_outbound = packet.direction == Direction.OUTBOUND
-        direction = "出站" if is_outbound else "入站"
-        
-        # 获取连接信息
-        src_addr = packet.src_addr
-        dst_addr = packet.dst_addr
-        src_port = packet.src_port
-        dst_port = packet.dst_port
+        # 先转发（封包未修改，无需重算校验和），解析和回调不再阻塞游戏连接
+        divert_handle.send(packet, recalculate_checksum=False)
         
         # 获取 TCP 载荷
         payload = packet.payload
         
-        if not payload or len(payload) == 0:
-            # 空载荷，直接转发
-            divert_handle.send(packet)
+        if not payload:
             return
         
-        # 解析封包
-        parsed_data = self._parse_payload(payload)
+        if payload[0] != self.magic_byte or payload[-1] != 0x21 or len(payload) < 19:
+            # 首尾字节或长度不符合游戏封包格式（解析器同样会判定失败），不创建解析结果
+            self.stats['rejected'] += 1
+            return
         
-        if parsed_data and parsed_data.get('success'):
-            self.stats['parsed'] += 1
+        # 交给解析线程，时间戳在抓包时记录（纳秒，显示时再转换为 datetime）
+        try:
+            parse_queue.put_nowait((packet, payload, time.time_ns()))
+        except queue.Full:
+            # 解析线程跟不上，丢弃该封包的解析和显示（封包本身已转发）
+            self.stats['dropped'] += 1
+    
+    def _parse_loop(self, parse_queue):
+        """
+        解析循环（在独立线程中运行），依次解析拦截线程转发后入队的封包并调用回调
+        
+        Args:
+            parse_queue: 本次启动创建的解析队列
+        """
+        while True:
+            item = parse_queue.get()
+            if item is None:
+                break
             
-            # 构建封包数据对象
-            packet_data = {
-                'timestamp': datetime.now(),
-                'direction': direction,
-                'src_addr': src_addr,
-                'src_port': src_port,
-                'dst_addr': dst_addr,
-                'dst_port': dst_port,
-                'payload': payload,
-                'parsed_data': parsed_data
-            }
+            packet, payload, timestamp = item
             
-            # 调用回调函数
-            if self.callback:
-                try:
-                    self.callback(packet_data)
-                except Exception as e:
-                    print(f"[拦截器] 回调函数错误: {e}")
-        else:
-            self.stats['failed'] += 1
-        
-        # 转发封包（不修改）
-        divert_handle.send(packet)
+            # 解析封包
+            parsed_data = self._parse_payload(payload)
+            
+            if parsed_data and parsed_data.get('success'):
+                self.stats['parsed'] += 1
+                
+                # 解析成功后才读取方向和连接信息（非游戏封包无需这些属性）
+                is_outbound = packet.direction == Direction.OUTBOUND
+                
+                # 构建封包数据对象
+                packet_data = {
+                    'timestamp': timestamp,
+                    'direction': "出站" if is_outbound else "入站",
+                    'src_addr': packet.src_addr,
+                    'src_port': packet.src_port,
+                    'dst_addr': packet.dst_addr,
+                    'dst_port': packet.dst_port,
+                    'payload': payload,
+                    'parsed_data': parsed_data
+                }
+                
+                # 调用回调函数
+                if self.callback:
+                    try:
+                        self.callback(packet_data)
+                    except Exception as e:
+                        print(f"[拦截器] 回调函数错误: {e}")
+            else:
+                self.stats['parse_failed'] += 1
     
     def _parse_payload(self, payload):
         """
@@ -204,7 +436,7 @@ class PacketInterceptor:
             payload: 字节数据
         
         Returns:
-            dict: 解析结果
+            ParsedPacket: 解析结果
         """
         # 延迟导入解析器
         if self.parser is None:
@@ -215,15 +447,12 @@ class PacketInterceptor:
                 print("[拦截器] 警告: 无法导入解析器")
                 return None
         
-        # 转换为十六进制字符串
-        hex_data = ' '.join(f'{b:02X}' for b in payload)
-        
-        # 调用解析器
+        # 调用解析器（直接解析字节，无需先转换为十六进制字符串）
         try:
-            result = self.parser.parse(hex_data)
+            result = self.parser.parse_bytes(payload)
             return result
         except Exception as e:
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': f"解析异常: {str(e)}"}
     
     def get_stats(self):
         """获取统计信息"""
@@ -236,7 +465,8 @@ class PacketInterceptor:
         return {
             'total': self.stats['total'],
             'parsed': self.stats['parsed'],
-            'failed': self.stats['failed'],
+            'failed': self.stats['rejected'] + self.stats['parse_failed'],
+            'dropped': self.stats['dropped'],
             'rate': f"{rate:.2f} pkt/s"
         }
     
@@ -248,6 +478,7 @@ class PacketInterceptor:
         print(f"  总封包数: {stats['total']}")
         print(f"  解析成功: {stats['parsed']}")
         print(f"  解析失败: {stats['failed']}")
+        print(f"  队列满丢弃: {stats['dropped']}")
         print(f"  速率: {stats['rate']}")
         print("=" * 60)
 
@@ -280,7 +511,7 @@ if __name__ == '__main__':
     
     # 测试回调函数
     def on_packet(packet_data):
-        print(f"\n[{packet_data['timestamp'].strftime('%H:%M:%S')}] "
+        print(f"\n[{datetime.fromtimestamp(packet_data['timestamp'] / 1e9).strftime('%H:%M:%S')}] "
               f"{packet_data['direction']} "
               f"{packet_data['src_addr']}:{packet_data['src_port']} → "
               f"{packet_data['dst_addr']}:{packet_data['dst_port']}")
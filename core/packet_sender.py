@@ -12,21 +12,33 @@
 import socket
 import time
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Deque, Union
+from collections import deque
 from dataclasses import dataclass
 from threading import Thread, Lock
 from datetime import datetime
 
-from .crypto import UniversalPacketParser
+from .crypto import UniversalPacketParser, ParsedPacket
 
 
-@dataclass
+# 脚本/明文格式的正则表达式（预编译）
+_WAIT_RE = re.compile(r'wait\((\d+)\)')
+_REPEAT_RE = re.compile(r'repeat\((\d+)\)')
+_PLAINTEXT_RE = re.compile(r'发送封包[（(](.+?)[）)]')
+
+
+@dataclass(slots=True)
 class SendResult:
-    """发送结果"""
+    """发送结果（批量/脚本发送会产生大量结果对象，使用 __slots__ 减少内存占用）"""
     success: bool
-    timestamp: datetime
+    timestamp: int  # 发送时间（time.time_ns()，纳秒），显示时使用 datetime 属性
     packet_hex: str
     error: Optional[str] = None
+    
+    @property
+    def datetime(self) -> datetime:
+        """发送时间（datetime 格式，用于显示）"""
+        return datetime.fromtimestamp(self.timestamp / 1e9)
 
 
 class PacketSender:
@@ -61,22 +73,23 @@ class PacketSender:
             'start_time': None,
         }
         
-        # 发送历史
-        self.history: List[SendResult] = []
-        self.history_lock = Lock()
+        # 发送历史（deque 超出上限时自动丢弃最旧的记录）
         self.max_history = 1000
+        self.history: Deque[SendResult] = deque(maxlen=self.max_history)
+        self.history_lock = Lock()
         
         # 脚本执行状态
         self.script_running = False
         self.script_thread: Optional[Thread] = None
     
-    def connect(self, host: str = None, port: int = None) -> bool:
+    def connect(self, host: str = None, port: int = None, nodelay: bool = True) -> bool:
         """
         连接到游戏服务器
         
         Args:
             host: 服务器地址
             port: 服务器端口
+            nodelay: 是否关闭 Nagle 算法（False 时小封包由协议栈合并发送）
             
         Returns:
             是否连接成功
@@ -98,6 +111,14 @@ class PacketSender:
             # 创建新连接
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(5)  # 5秒超时
+            # 关闭 Nagle 算法，小封包立即发出（脚本中 wait() 间隔的封包不会被合并延迟）
+            if nodelay:
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # 增大发送缓冲区（Windows 默认仅 8KB），批量/脚本高频发送时不因缓冲区排空而阻塞
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            # Linux 下立即回复 ACK（Windows 无此选项）
+            if hasattr(socket, 'TCP_QUICKACK'):
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
             
             print(f"正在连接到 {self.host}:{self.port}...")
             self.socket.connect((self.host, self.port))
@@ -139,19 +160,12 @@ class PacketSender:
         Returns:
             发送结果
         """
-        result = SendResult(
-            success=False,
-            timestamp=datetime.now(),
-            packet_hex=' '.join(f'{b:02X}' for b in data)
-        )
-        
-        if not self.connected or not self.socket:
-            result.error = "未连接到服务器"
-            self.stats['total_failed'] += 1
+        result = self._new_result(data)
+        if result.error:
             return result
         
         try:
-            self.socket.send(data)
+            self.socket.sendall(data)
             result.success = True
             self.stats['total_sent'] += 1
         
@@ -163,11 +177,44 @@ class PacketSender:
         # 添加到历史
         with self.history_lock:
             self.history.append(result)
-            if len(self.history) > self.max_history:
-                self.history.pop(0)
         
         return result
     
+    def _new_result(self, data: bytes) -> SendResult:
+        """为待发送的数据创建发送结果（未连接时直接标记为失败）"""
+        result = SendResult(
+            success=False,
+            timestamp=time.time_ns(),
+            packet_hex=data.hex(' ').upper()
+        )
+        
+        if not self.connected or not self.socket:
+            result.error = "未连接到服务器"
+            self.stats['total_failed'] += 1
+        
+        return result
+    
+    def _send_joined(self, pending: List[Tuple[bytes, SendResult]]):
+        """将批量发送缓存的封包合并为一次 sendall 发送，并更新各封包的发送结果"""
+        if not pending:
+            return
+        
+        try:
+            self.socket.sendall(b''.join(data for data, _ in pending))
+            for _, result in pending:
+                result.success = True
+            self.stats['total_sent'] += len(pending)
+        
+        except Exception as e:
+            for _, result in pending:
+                result.error = f"发送失败: {e}"
+            self.stats['total_failed'] += len(pending)
+            self.connected = False
+        
+        # 添加到历史
+        with self.history_lock:
+            self.history.extend(result for _, result in pending)
+    
     def send_packet(self, parsed_data: Dict[str, Any], sequence: Optional[int] = None) -> SendResult:
         """
         发送封包（从解析结果）
@@ -182,7 +229,7 @@ class PacketSender:
         if not parsed_data.get('success'):
             return SendResult(
                 success=False,
-                timestamp=datetime.now(),
+                timestamp=time.time_ns(),
                 packet_hex="",
                 error="解析数据无效"
             )
@@ -192,7 +239,7 @@ class PacketSender:
             ascii_enc, hex_enc = self.parser.reconstruct(parsed_data, sequence)
             
             # 转换为字节
-            data = bytes.fromhex(hex_enc.replace(" ", ""))
+            data = bytes.fromhex(hex_enc)
             
             # 发送
             return self.send_raw(data)
@@ -200,7 +247,7 @@ class PacketSender:
         except Exception as e:
             return SendResult(
                 success=False,
-                timestamp=datetime.now(),
+                timestamp=time.time_ns(),
                 packet_hex="",
                 error=f"重构失败: {e}"
             )
@@ -216,12 +263,12 @@ class PacketSender:
             发送结果
         """
         try:
-            data = bytes.fromhex(hex_string.replace(" ", ""))
+            data = bytes.fromhex(hex_string)
             return self.send_raw(data)
         except Exception as e:
             return SendResult(
                 success=False,
-                timestamp=datetime.now(),
+                timestamp=time.time_ns(),
                 packet_hex=hex_string,
                 error=f"十六进制解析失败: {e}"
             )
@@ -246,7 +293,7 @@ class PacketSender:
         except Exception as e:
             return SendResult(
                 success=False,
-                timestamp=datetime.now(),
+                timestamp=time.time_ns(),
                 packet_hex="",
                 error=f"明文解析失败: {e}"
             )
@@ -262,7 +309,7 @@ class PacketSender:
             解析结果（兼容 UniversalPacketParser 格式）
         """
         # 提取参数
-        match = re.search(r'发送封包[（(](.+?)[）)]', plaintext)
+        match = _PLAINTEXT_RE.search(plaintext)
         if not match:
             raise ValueError("明文格式错误")
         
@@ -301,39 +348,127 @@ class PacketSender:
         Args:
             packets: 封包列表（可以是 parsed_data、hex_string 或 plaintext）
             count: 每个封包发送次数
-            interval: 发送间隔（秒）
+            interval: 发送间隔（秒，<=0 时所有封包合并为一次发送）
             
         Returns:
             发送结果列表
         """
         results = []
         
-        for packet in packets:
-            for i in range(count):
-                # 判断封包类型并发送
-                if isinstance(packet, dict):
-                    result = self.send_packet(packet)
-                elif isinstance(packet, str):
-                    if packet.startswith('发送封包'):
-                        result = self.send_plaintext(packet)
-                    else:
-                        result = self.send_hex(packet)
+        # 无间隔时逐个编码封包（序号照常递增），缓存在本地列表中，最后合并为一次 sendall
+        pending: Optional[List[Tuple[bytes, SendResult]]] = [] if interval <= 0 else None
+        
+        try:
+            for packet in packets:
+                # 明文只解析一次，重复发送时仅重构（序号照常递增）
+                parse_error = None
+                if isinstance(packet, (dict, ParsedPacket)):
+                    parsed_packet = packet
+                elif isinstance(packet, str) and packet.startswith('发送封包'):
+                    try:
+                        parsed_packet = self._parse_plaintext(packet)
+                    except Exception as e:
+                        parsed_packet = None
+                        parse_error = e
                 else:
-                    result = SendResult(
-                        success=False,
-                        timestamp=datetime.now(),
-                        packet_hex="",
-                        error="不支持的封包类型"
-                    )
+                    parsed_packet = None
                 
-                results.append(result)
+                # 序号只有 1-9 九种取值，同一封包按序号缓存加密结果，重复发送时不再重构
+                encoded: Dict[int, bytes] = {}
                 
-                # 间隔
-                if interval > 0 and (i < count - 1 or packet != packets[-1]):
-                    time.sleep(interval)
+                for i in range(count):
+                    data = self._encode_batch_packet(packet, parsed_packet, parse_error, encoded)
+                    
+                    if isinstance(data, SendResult):
+                        # 无法生成封包字节，data 即失败结果
+                        result = data
+                    elif pending is not None:
+                        result = self._new_result(data)
+                        if not result.error:
+                            pending.append((data, result))
+                    else:
+                        result = self.send_raw(data)
+                    
+                    results.append(result)
+                    
+                    # 间隔
+                    if interval > 0 and (i < count - 1 or packet != packets[-1]):
+                        time.sleep(interval)
+        finally:
+            if pending:
+                self._send_joined(pending)
         
         return results
     
+    def _encode_batch_packet(self, packet: Any, parsed_packet: Optional[Dict[str, Any]],
+                             parse_error: Optional[Exception], encoded: Dict[int, bytes]) -> Union[bytes, SendResult]:
+        """
+        生成批量发送中一次发送的封包字节（不发送）
+        
+        结构化封包按自动递增的序号编码，加密结果按序号缓存在 encoded 中（同一封包重复发送时复用）
+        
+        Args:
+            packet: 原始封包条目
+            parsed_packet: 解析结果（packet 为结构化数据或可解析的明文时）
+            parse_error: 明文解析失败的异常
+            encoded: 序号 -> 封包字节 的缓存（调用方按封包分别持有）
+            
+        Returns:
+            封包字节；无法生成时返回失败的发送结果
+        """
+        if parsed_packet is not None:
+            if not parsed_packet.get('success'):
+                return SendResult(
+                    success=False,
+                    timestamp=time.time_ns(),
+                    packet_hex="",
+                    error="解析数据无效"
+                )
+            
+            sequence = self.parser.sequence
+            data = encoded.get(sequence)
+            if data is None:
+                try:
+                    ascii_enc, _ = self.parser.reconstruct(parsed_packet, sequence)
+                except Exception as e:
+                    return SendResult(
+                        success=False,
+                        timestamp=time.time_ns(),
+                        packet_hex="",
+                        error=f"重构失败: {e}"
+                    )
+                data = encoded[sequence] = ascii_enc.encode('latin-1')
+            
+            # 与 reconstruct 自动分配序号时一致：成功编码后序号递增
+            self.parser.sequence = (sequence % 9) + 1
+            return data
+        
+        if parse_error is not None:
+            return SendResult(
+                success=False,
+                timestamp=time.time_ns(),
+                packet_hex="",
+                error=f"明文解析失败: {parse_error}"
+            )
+        
+        if isinstance(packet, str):
+            try:
+                return bytes.fromhex(packet)
+            except Exception as e:
+                return SendResult(
+                    success=False,
+                    timestamp=time.time_ns(),
+                    packet_hex=packet,
+                    error=f"十六进制解析失败: {e}"
+                )
+        
+        return SendResult(
+            success=False,
+            timestamp=time.time_ns(),
+            packet_hex="",
+            error="不支持的封包类型"
+        )
+    
     def send_script(self, script: str) -> List[SendResult]:
         """
         执行脚本
@@ -355,67 +490,135 @@ class PacketSender:
         Returns:
             发送结果列表
         """
-        results = []
-        lines = script.strip().split('\n')
+        return self.run_compiled_script(self.compile_script(script))
+    
+    def compile_script(self, script: str) -> List[Tuple]:
+        """
+        将脚本编译为扁平的指令列表（只解析一次，可重复执行）
+        
+        指令格式：
+            ('SEND', parsed_data, line)   发送封包（明文在编译时解析，执行时重构以保证序号递增）
+            ('WAIT', seconds)             等待
+            ('REPEAT', count, end_pc)     循环开始，end_pc 为对应 END 指令的位置
+            ('END', start_pc)             循环结束，start_pc 为对应 REPEAT 指令的位置
+            ('WARN', line)                未知命令（执行时打印警告）
+        
+        Args:
+            script: 脚本内容
+            
+        Returns:
+            指令列表
+        """
+        ops: List[Tuple] = []
+        # 未闭合的循环栈：元素为 REPEAT 指令位置；格式错误的 repeat 压入 None，其 end 按未知命令处理
+        open_repeats: List[Optional[int]] = []
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        for line in script.strip().split('\n'):
+            line = line.strip()
             
             # 跳过空行和注释
             if not line or line.startswith('#'):
-                i += 1
                 continue
             
             # wait 命令
             if line.startswith('wait('):
-                match = re.search(r'wait\((\d+)\)', line)
+                match = _WAIT_RE.search(line)
                 if match:
-                    ms = int(match.group(1))
-                    time.sleep(ms / 1000.0)
-                i += 1
+                    ops.append(('WAIT', int(match.group(1)) / 1000.0))
                 continue
             
-            # repeat 命令
+            # repeat 命令：记录循环开始位置，结束位置在对应 end 处回填
             if line.startswith('repeat('):
-                match = re.search(r'repeat\((\d+)\)', line)
+                match = _REPEAT_RE.search(line)
                 if match:
-                    repeat_count = int(match.group(1))
-                    
-                    # 找到对应的 end
-                    repeat_lines = []
-                    i += 1
-                    depth = 1
-                    while i < len(lines) and depth > 0:
-                        if lines[i].strip().startswith('repeat('):
-                            depth += 1
-                        elif lines[i].strip() == 'end':
-                            depth -= 1
-                            if depth == 0:
-                                break
-                        
-                        if depth > 0:
-                            repeat_lines.append(lines[i])
-                        i += 1
-                    
-                    # 执行重复
-                    for _ in range(repeat_count):
-                        repeat_script = '\n'.join(repeat_lines)
-                        results.extend(self.send_script(repeat_script))
-                
-                i += 1
+                    open_repeats.append(len(ops))
+                    ops.append(('REPEAT', int(match.group(1)), None))
+                else:
+                    open_repeats.append(None)
+                continue
+            
+            # end 命令：闭合最近的循环
+            if line == 'end' and open_repeats:
+                start_pc = open_repeats.pop()
+                if start_pc is not None:
+                    self._close_repeat(ops, start_pc)
+                else:
+                    ops.append(('WARN', line))
                 continue
             
             # 发送封包
             if line.startswith('发送封包'):
-                result = self.send_plaintext(line)
-                results.append(result)
-                i += 1
+                try:
+                    parsed_data = self._parse_plaintext(line)
+                except Exception:
+                    # 明文格式错误：执行时由 send_plaintext 返回失败结果
+                    parsed_data = None
+                ops.append(('SEND', parsed_data, line))
                 continue
             
             # 未知命令
-            print(f"警告：未知命令: {line}")
-            i += 1
+            ops.append(('WARN', line))
+        
+        # 缺少 end 的循环延伸到脚本末尾
+        while open_repeats:
+            start_pc = open_repeats.pop()
+            if start_pc is not None:
+                self._close_repeat(ops, start_pc)
+        
+        return ops
+    
+    @staticmethod
+    def _close_repeat(ops: List[Tuple], start_pc: int):
+        """回填 REPEAT 指令的结束位置并追加对应的 END 指令"""
+        ops[start_pc] = ('REPEAT', ops[start_pc][1], len(ops))
+        ops.append(('END', start_pc))
+    
+    def run_compiled_script(self, ops: List[Tuple]) -> List[SendResult]:
+        """
+        执行 compile_script() 编译后的指令列表
+        
+        Args:
+            ops: 指令列表
+            
+        Returns:
+            发送结果列表
+        """
+        results = []
+        counters = []  # 循环剩余次数栈
+        warned = set()  # 已警告过的指令位置（循环体内的未知命令只警告一次，避免刷屏）
+        
+        pc = 0
+        while pc < len(ops):
+            op = ops[pc]
+            kind = op[0]
+            
+            if kind == 'SEND':
+                if op[1] is not None:
+                    results.append(self.send_packet(op[1]))
+                else:
+                    results.append(self.send_plaintext(op[2]))
+            
+            elif kind == 'WAIT':
+                time.sleep(op[1])
+            
+            elif kind == 'REPEAT':
+                if op[1] <= 0:
+                    pc = op[2] + 1
+                    continue
+                counters.append(op[1])
+            
+            elif kind == 'END':
+                counters[-1] -= 1
+                if counters[-1] > 0:
+                    pc = op[1] + 1
+                    continue
+                counters.pop()
+            
+            elif pc not in warned:
+                warned.add(pc)
+                print(f"警告：未知命令: {op[1]}")
+            
+            pc += 1
         
         return results
     
@@ -489,9 +692,9 @@ class PacketSender:
         """
         with self.history_lock:
             if count is None:
-                return self.history.copy()
+                return list(self.history)
             else:
-                return self.history[-count:].copy()
+                return list(self.history)[-count:]
     
     def clear_history(self):
         """清空发送历史"""
@@ -6,11 +6,23 @@ PyInstaller 配置文件 - 重构版
 优化目标:
 - EXE 体积 < 5MB
 - 排除所有不必要的依赖
+- 字节码优化级别 2（-OO）：去除 docstring 和 assert
 - 请求管理员权限
 """
 
+import PyInstaller
+
 block_cipher = None
 
+# Analysis 的 optimize 参数需要 PyInstaller >= 6.0，旧版本不传（打包结果保留 docstring/assert）
+analysis_options = {}
+if int(PyInstaller.__version__.split('.')[0]) >= 6:
+    # 等同 python -OO：打包的模块去除 docstring，assert 语句不再执行
+    # （项目代码不依赖 __doc__ 或 assert）
+    analysis_options['optimize'] = 2
+else:
+    print(f"警告: PyInstaller {PyInstaller.__version__} 不支持 optimize 参数，建议升级到 6.0 以上")
+
 a = Analysis(
     ['main_new.py'],
     pathex=[],
@@ -92,6 +104,7 @@ a = Analysis(
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
+    **analysis_options,
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
@@ -19,9 +19,9 @@
 import sys
 import os
 
-# 检查 Python 版本
-if sys.version_info < (3, 6):
-    print("错误: 需要 Python 3.6 或更高版本")
+# 检查 Python 版本（解析结果使用 dataclass(slots=True)，需要 3.10；须在导入 core 之前检查）
+if sys.version_info < (3, 10):
+    print("错误: 需要 Python 3.10 或更高版本")
     sys.exit(1)
 
 # 检查管理员权限
@@ -39,6 +39,9 @@ def main():
         print("-" * 70)
         
         try:
+            # 样本十六进制只转换一次，序号和加密验证共用
+            raw = bytes.fromhex(sample['hex'])
+            
             # 解密
             decrypted, params, detected_type = crypto.decrypt_packet(
                 sample['hex'], 
@@ -55,18 +58,17 @@ def main():
             print(f"  明文: {plaintext}")
             
             # 重新加密验证
-            seq = int(chr(bytes.fromhex(sample['hex'].replace(" ", ""))[1]))
+            seq = raw[1] - 0x30
             ascii_enc, hex_enc = crypto.encrypt_packet(params, sample['type'], sequence=seq)
             
-            # 验证加密结果
-            original = sample['hex'].replace(" ", "")
-            encrypted = hex_enc.replace(" ", "")
+            # 验证加密结果（按字节比较）
+            encrypted = bytes.fromhex(hex_enc)
             
-            if original == encrypted:
+            if raw == encrypted:
                 print(f"✓ 加密验证通过")
             else:
                 # 检查前16字节是否匹配
-                if original[:34] == encrypted[:34]:
+                if raw[:17] == encrypted[:17]:
                     print(f"✓ 核心数据加密正确（前16字节匹配）")
                 else:
                     print(f"✗ 加密验证失败")
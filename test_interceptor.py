@@ -11,6 +11,8 @@
 
 import sys
 import time
+import threading
+from collections import deque
 from datetime import datetime
 
 # 检查是否有管理员权限
@@ -44,41 +46,53 @@ except ImportError as e:
 # 统计信息
 packet_count = 0
 parsed_count = 0
-last_print_time = time.time()
+
+# 回调只把封包放入环形缓冲区，由打印线程每秒取出并显示，回调中不做格式化和打印
+packet_ring = deque(maxlen=4096)
 
 def on_packet(packet_data):
     """封包回调函数"""
-    global packet_count, parsed_count, last_print_time
+    global packet_count
     
     packet_count += 1
+    packet_ring.append(packet_data)
+
+def print_loop():
+    """打印线程：每秒最多打印一次，避免刷屏"""
+    global parsed_count
     
-    # 每秒最多打印一次，避免刷屏
-    current_time = time.time()
-    if current_time - last_print_time < 1.0:
-        return
-    
-    last_print_time = current_time
-    
-    # 打印封包信息
-    print(f"\n[{packet_data['timestamp'].strftime('%H:%M:%S')}] "
-          f"{packet_data['direction']} "
-          f"{packet_data['src_addr']}:{packet_data['src_port']} → "
-          f"{packet_data['dst_addr']}:{packet_data['dst_port']}")
-    
-    # 打印解析结果
-    parsed_data = packet_data.get('parsed_data', {})
-    if parsed_data.get('success'):
-        parsed_count += 1
-        print(f"  ✓ 功能: {parsed_data.get('function_name', '未知')}")
-        plaintext = parsed_data.get('plaintext', '')
-        if len(plaintext) > 50:
-            plaintext = plaintext[:50] + "..."
-        print(f"  ✓ 明文: {plaintext}")
-    else:
-        print(f"  ✗ 解析失败: {parsed_data.get('error', '未知错误')}")
-    
-    # 打印统计
-    print(f"  统计: 总计 {packet_count} | 解析成功 {parsed_count}")
+    while True:
+        time.sleep(1.0)
+        
+        # 取出这一秒内收到的封包，只显示最新的一个
+        packet_data = None
+        while packet_ring:
+            packet_data = packet_ring.popleft()
+            if packet_data.get('parsed_data', {}).get('success'):
+                parsed_count += 1
+        
+        if packet_data is None:
+            continue
+        
+        # 打印封包信息
+        print(f"\n[{datetime.fromtimestamp(packet_data['timestamp'] / 1e9).strftime('%H:%M:%S')}] "
+              f"{packet_data['direction']} "
+              f"{packet_data['src_addr']}:{packet_data['src_port']} → "
+              f"{packet_data['dst_addr']}:{packet_data['dst_port']}")
+        
+        # 打印解析结果
+        parsed_data = packet_data.get('parsed_data', {})
+        if parsed_data.get('success'):
+            print(f"  ✓ 功能: {parsed_data.get('function_name', '未知')}")
+            plaintext = parsed_data.get('plaintext', '')
+            if len(plaintext) > 50:
+                plaintext = plaintext[:50] + "..."
+            print(f"  ✓ 明文: {plaintext}")
+        else:
+            print(f"  ✗ 解析失败: {parsed_data.get('error', '未知错误')}")
+        
+        # 打印统计
+        print(f"  统计: 总计 {packet_count} | 解析成功 {parsed_count}")
 
 def main():
     """主函数"""
@@ -129,6 +143,7 @@ def main():
     
     try:
         interceptor.start()
+        threading.Thread(target=print_loop, daemon=True).start()
         
         # 等待用户中断
         while True:
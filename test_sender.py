@@ -11,8 +11,59 @@
 
 import sys
 import time
+from collections import defaultdict
 from core.packet_sender import PacketSender
-from core.packet_capture import GameProcessDetector
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+GAME_PROCESS_NAMES = frozenset(["mir.exe", "legend.exe", "game.exe", "client.exe"])
+
+
+def find_game_connections():
+    """
+    检测游戏进程及其 TCP 连接（进程表和连接表各只扫描一次）
+    
+    Returns:
+        [(local_ip, local_port, remote_ip, remote_port), ...]
+    """
+    if not HAS_PSUTIL:
+        print("提示: 安装 psutil 可以自动检测游戏连接 (pip install psutil)")
+        return []
+    
+    # 一次遍历进程表，按名称匹配游戏进程
+    game_pids = {}
+    for proc in psutil.process_iter(['name']):
+        name = (proc.info['name'] or '').lower()
+        if name in GAME_PROCESS_NAMES:
+            game_pids[proc.pid] = name
+    
+    if not game_pids:
+        return []
+    
+    # 一次获取所有 TCP 连接，按 PID 分组
+    connections_by_pid = defaultdict(list)
+    try:
+        for conn in psutil.net_connections(kind='tcp'):
+            if conn.pid in game_pids and conn.laddr:
+                remote_ip, remote_port = conn.raddr if conn.raddr else (None, None)
+                connections_by_pid[conn.pid].append((conn.laddr.ip, conn.laddr.port, remote_ip, remote_port))
+    except (psutil.Error, OSError) as e:
+        print(f"获取连接信息失败: {e}")
+        return []
+    
+    found_connections = []
+    for pid, connections in connections_by_pid.items():
+        found_connections.extend(connections)
+        print(f"✓ 找到游戏进程: {game_pids[pid]} (PID: {pid})")
+        for local_ip, local_port, remote_ip, remote_port in connections:
+            if remote_ip:
+                print(f"  连接: {local_ip}:{local_port} → {remote_ip}:{remote_port}")
+    
+    return found_connections
 
 def test_connection():
     """测试连接"""
@@ -22,21 +73,7 @@ def test_connection():
     
     # 尝试检测游戏进程
     print("\n正在检测游戏进程...")
-    detector = GameProcessDetector()
-    
-    game_names = ["mir.exe", "legend.exe", "game.exe", "client.exe"]
-    found_connections = []
-    
-    for name in game_names:
-        processes = detector.find_process_by_name(name)
-        for proc in processes:
-            connections = detector.get_process_connections(proc)
-            if connections:
-                found_connections.extend(connections)
-                print(f"✓ 找到游戏进程: {name} (PID: {proc.pid})")
-                for local_ip, local_port, remote_ip, remote_port in connections:
-                    if remote_ip:
-                        print(f"  连接: {local_ip}:{local_port} → {remote_ip}:{remote_port}")
+    found_connections = find_game_connections()
     
     # 输入服务器信息
     print("\n请输入服务器信息：")
@@ -86,7 +123,7 @@ def test_send_single(sender: PacketSender):
             
             if result.success:
                 print(f"\n✓ 发送成功")
-                print(f"  时间: {result.timestamp}")
+                print(f"  时间: {result.datetime}")
                 print(f"  数据: {result.packet_hex[:60]}...")
             else:
                 print(f"\n✗ 发送失败: {result.error}")
@@ -100,7 +137,7 @@ def test_send_single(sender: PacketSender):
             
             if result.success:
                 print(f"\n✓ 发送成功")
-                print(f"  时间: {result.timestamp}")
+                print(f"  时间: {result.datetime}")
             else:
                 print(f"\n✗ 发送失败: {result.error}")
 
@@ -257,7 +294,7 @@ def main():
                     print("\n最近5条发送记录：")
                     for i, result in enumerate(history, 1):
                         status = "✓" if result.success else "✗"
-                        print(f"  {i}. {status} {result.timestamp.strftime('%H:%M:%S')} - {result.packet_hex[:40]}...")
+                        print(f"  {i}. {status} {result.datetime.strftime('%H:%M:%S')} - {result.packet_hex[:40]}...")
                         if result.error:
                             print(f"     错误: {result.error}")
             
@@ -12,6 +12,8 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import time
+from collections import deque
+from operator import itemgetter
 from datetime import datetime
 import sys
 import os
@@ -22,49 +24,137 @@ if sys.platform == 'win32':
     from ctypes import wintypes
     user32 = ctypes.windll.user32
     kernel32 = ctypes.windll.kernel32
-    psapi = ctypes.windll.psapi
+    
+    TH32CS_SNAPPROCESS = 0x00000002
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+    
+    class PROCESSENTRY32W(ctypes.Structure):
+        """Toolhelp 进程快照条目"""
+        _fields_ = [
+            ("dwSize", wintypes.DWORD),
+            ("cntUsage", wintypes.DWORD),
+            ("th32ProcessID", wintypes.DWORD),
+            ("th32DefaultHeapID", ctypes.c_size_t),  # ULONG_PTR
+            ("th32ModuleID", wintypes.DWORD),
+            ("cntThreads", wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase", wintypes.LONG),
+            ("dwFlags", wintypes.DWORD),
+            ("szExeFile", ctypes.c_wchar * 260),
+        ]
+    
+    # 句柄为指针宽度，按 HANDLE 声明参数和返回值，避免 64 位下被截断
+    kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+    kernel32.Process32FirstW.restype = wintypes.BOOL
+    kernel32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+    kernel32.Process32NextW.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    
+    # EnumWindows 回调：BOOL CALLBACK EnumWindowsProc(HWND hwnd, LPARAM lParam)，HWND/LPARAM 均为指针宽度
+    EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    user32.EnumWindows.argtypes = [EnumWindowsProc, wintypes.LPARAM]
+    user32.EnumWindows.restype = wintypes.BOOL
+    user32.IsWindowVisible.argtypes = [wintypes.HWND]
+    user32.IsWindowVisible.restype = wintypes.BOOL
+    user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+    user32.GetWindowThreadProcessId.restype = wintypes.DWORD
+    user32.GetWindowTextLengthW.argtypes = [wintypes.HWND]
+    user32.GetWindowTextLengthW.restype = ctypes.c_int
+    user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+    user32.GetWindowTextW.restype = ctypes.c_int
+    
+    _PY_OBJECT_P = ctypes.POINTER(ctypes.py_object)
+    
+    def _enum_window_titles_callback(hwnd, lParam):
+        """EnumWindows 回调：lParam 指向 {pid: 窗口标题} 字典，记录每个进程第一个有标题的可见窗口"""
+        titles = ctypes.cast(lParam, _PY_OBJECT_P).contents.value
+        
+        if user32.IsWindowVisible(hwnd):
+            window_pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+            
+            if window_pid.value not in titles:
+                length = user32.GetWindowTextLengthW(hwnd)
+                if length > 0:
+                    buff = ctypes.create_unicode_buffer(length + 1)
+                    user32.GetWindowTextW(hwnd, buff, length + 1)
+                    if buff.value:
+                        titles[window_pid.value] = buff.value
+        return True
+    
+    # 回调桩只创建一次，每次枚举复用（状态通过 lParam 传入）
+    _ENUM_WINDOW_TITLES_PROC = EnumWindowsProc(_enum_window_titles_callback)
+
+# 载荷 ASCII 显示：可打印字符保留，其余显示为 '.'
+_PRINTABLE_ASCII_TABLE = bytes(c if 32 <= c < 127 else 0x2E for c in range(256))
 
 
 class ProcessSelector:
     """进程选择器 - 支持列表选择和拖动瞄准器"""
     
+    # 进程列表缓存有效期（秒），短时间内重复打开选择窗口时不再重新枚举
+    CACHE_TTL = 2.0
+    _cache = None  # (time.monotonic(), processes)
+    
+    @classmethod
+    def list_processes(cls, refresh=False, with_titles=True):
+        """
+        列出所有进程
+        
+        Args:
+            refresh: 忽略缓存，强制重新枚举
+            with_titles: 是否填充窗口标题（False 时 title 为空，可稍后用 _build_pid_title_map 补充）
+        """
+        cache = cls._cache
+        if refresh or not cache or time.monotonic() - cache[0] >= cls.CACHE_TTL:
+            cache = cls._cache = (time.monotonic(), cls._enumerate_processes())
+        
+        if not with_titles:
+            return [dict(p) for p in cache[1]]
+        
+        # 一次枚举所有顶层窗口，得到 PID -> 窗口标题
+        titles = cls._build_pid_title_map()
+        return [dict(p, title=titles.get(p['pid'], "")) for p in cache[1]]
+    
     @staticmethod
-    def list_processes():
-        """列出所有进程"""
+    def _enumerate_processes():
+        """枚举所有进程（进程快照，不含窗口标题，按名称排序）"""
         processes = []
         
         if sys.platform != 'win32':
             return processes
         
         try:
-            arr = (wintypes.DWORD * 2048)()
-            cb_needed = wintypes.DWORD()
+            # 一次进程快照即可拿到所有进程的 PID 和映像名，无需逐个 OpenProcess（受保护进程也能列出）
+            snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+            if not snapshot or snapshot == INVALID_HANDLE_VALUE:
+                print(f"创建进程快照失败: {ctypes.GetLastError()}")
+                return processes
             
-            if psapi.EnumProcesses(ctypes.byref(arr), ctypes.sizeof(arr), ctypes.byref(cb_needed)):
-                count = cb_needed.value // ctypes.sizeof(wintypes.DWORD)
+            try:
+                entry = PROCESSENTRY32W()
+                entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
                 
-                for i in range(count):
-                    pid = arr[i]
-                    if pid == 0:
-                        continue
-                    
-                    try:
-                        h_process = kernel32.OpenProcess(0x0410, False, pid)
-                        if h_process:
-                            exe_name = (ctypes.c_wchar * 260)()
-                            if psapi.GetModuleBaseNameW(h_process, None, exe_name, 260):
-                                name = exe_name.value
-                                if name and len(name.strip()) > 0:
-                                    # 获取窗口标题
-                                    title = ProcessSelector.get_window_title_by_pid(pid)
-                                    processes.append({
-                                        "pid": pid, 
-                                        "name": name,
-                                        "title": title
-                                    })
-                            kernel32.CloseHandle(h_process)
-                    except:
-                        pass
+                has_entry = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+                while has_entry:
+                    pid = entry.th32ProcessID
+                    name = entry.szExeFile
+                    if pid != 0 and name and len(name.strip()) > 0:
+                        processes.append({
+                            "pid": pid, 
+                            "name": name,
+                            "name_lc": name.lower(),
+                            "title": ""
+                        })
+                    has_entry = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+            finally:
+                kernel32.CloseHandle(snapshot)
+            
+            # 按小写名称排序一次，结果随缓存复用
+            processes.sort(key=itemgetter('name_lc'))
         except Exception as e:
             print(f"列举进程错误: {e}")
         
@@ -73,41 +163,41 @@ class ProcessSelector:
     @staticmethod
     def get_window_title_by_pid(pid):
         """根据 PID 获取窗口标题"""
-        if sys.platform != 'win32':
-            return ""
-        
-        titles = []
+        return ProcessSelector._build_pid_title_map().get(pid, "")
+    
+    @staticmethod
+    def _build_pid_title_map():
+        """枚举一次所有可见顶层窗口，返回 {pid: 窗口标题}（同一进程取第一个有标题的窗口）"""
+        titles = {}
         
-        def enum_windows_callback(hwnd, lParam):
-            if user32.IsWindowVisible(hwnd):
-                window_pid = wintypes.DWORD()
-                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
-                
-                if window_pid.value == pid:
-                    length = user32.GetWindowTextLengthW(hwnd)
-                    if length > 0:
-                        buff = ctypes.create_unicode_buffer(length + 1)
-                        user32.GetWindowTextW(hwnd, buff, length + 1)
-                        if buff.value:
-                            titles.append(buff.value)
-            return True
+        if sys.platform != 'win32':
+            return titles
         
-        try:
-            EnumWindowsProc = ctypes.WINFUNCTYPE(
-                ctypes.c_bool,
-                ctypes.POINTER(ctypes.c_int),
-                ctypes.POINTER(ctypes.c_int)
-            )
-            user32.EnumWindows(EnumWindowsProc(enum_windows_callback), 0)
-        except:
-            pass
+        # 字典通过 py_object 的地址作为 lParam 传给回调，枚举期间 titles_ref 保持引用
+        titles_ref = ctypes.py_object(titles)
+        if not user32.EnumWindows(_ENUM_WINDOW_TITLES_PROC, ctypes.addressof(titles_ref)):
+            print(f"枚举窗口失败: {ctypes.GetLastError()}")
         
-        return titles[0] if titles else ""
+        return titles
 
 
 class MainWindow:
     """主窗口 - tkinter 实现"""
     
+    # 封包列表最多同时显示的行数（其余封包只保存在 captured_packets 中，滚动到边缘时再载入）
+    MAX_TREE_ROWS = 500
+    # 滚动到列表边缘时每次载入的行数
+    TREE_PAGE_ROWS = 100
+    # 新封包批量刷新到列表的间隔（毫秒）和每次最多插入的行数
+    TREE_FLUSH_INTERVAL_MS = 50
+    TREE_FLUSH_MAX_ROWS = 500
+    # 列表可见区域底边超过该比例时视为停在底部，新封包追加后自动滚动
+    TREE_BOTTOM_THRESHOLD = 0.98
+    # 日志批量刷新间隔（毫秒）；日志超过 MAX_LOG_LINES 行时删除最早的 LOG_TRIM_LINES 行
+    LOG_FLUSH_INTERVAL_MS = 100
+    MAX_LOG_LINES = 5000
+    LOG_TRIM_LINES = 1000
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("传奇翎风封包工具")
@@ -122,6 +212,22 @@ class MainWindow:
         
         # 捕获的封包列表
         self.captured_packets = []
+        # 每个封包在列表中的一行（在捕获线程中预先格式化，与 captured_packets 一一对应）
+        self.packet_rows = []
+        # 保护上面两个列表的追加（捕获线程）与清空（UI 线程），保证二者始终一一对应
+        self._packets_lock = threading.Lock()
+        
+        # 封包列表当前显示的序号范围 [tree_start, tree_end)，序号从 1 开始
+        self.tree_start = 1
+        self.tree_end = 1
+        self._tree_paging = False
+        # 是否跟随最新封包（向上翻看历史时为 False，新封包暂不追加）
+        self._tree_follow = True
+        self._tree_flush_scheduled = False
+        
+        # 待写入日志区域的 (行, 级别)
+        self._log_queue = deque()
+        self._log_flush_scheduled = False
         
         # 设置 UI
         self.setup_ui()
@@ -226,11 +332,12 @@ class MainWindow:
             command=self.clear_packets
         ).pack(side=tk.LEFT, padx=5)
         
-        ttk.Button(
+        self.export_btn = ttk.Button(
             right_frame,
             text="💾 导出封包",
             command=self.export_packets
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        self.export_btn.pack(side=tk.LEFT, padx=5)
         
         ttk.Button(
             right_frame,
@@ -267,7 +374,8 @@ class MainWindow:
         
         # 滚动条
         scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.packet_tree.yview)
-        self.packet_tree.configure(yscrollcommand=scrollbar.set)
+        self.packet_tree_scrollbar = scrollbar
+        self.packet_tree.configure(yscrollcommand=self._on_tree_yscroll)
         
         self.packet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -348,18 +456,34 @@ class MainWindow:
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # 加载进程列表
-        self.log("正在加载进程列表...")
-        processes = ProcessSelector.list_processes()
+        # 窗口标题在后台线程中解析，完成后回到主线程填入（行 iid 为 PID）
+        def apply_titles(titles):
+            if not tree.winfo_exists():
+                return
+            for iid in tree.get_children():
+                tree.set(iid, "窗口标题", titles.get(int(iid)) or "(无窗口)")
         
-        for p in sorted(processes, key=lambda x: x['name'].lower()):
-            tree.insert("", tk.END, values=(
-                p['name'],
-                p['pid'],
-                p['title'] if p['title'] else "(无窗口)"
-            ))
+        def resolve_titles():
+            titles = ProcessSelector._build_pid_title_map()
+            self.root.after(0, apply_titles, titles)
         
-        self.log(f"已加载 {len(processes)} 个进程")
+        # 加载进程列表（先显示进程名和 PID）
+        def load_processes(refresh=False):
+            self.log("正在加载进程列表...")
+            processes = ProcessSelector.list_processes(refresh=refresh, with_titles=False)
+            
+            tree.delete(*tree.get_children())
+            for p in processes:
+                tree.insert("", tk.END, iid=str(p['pid']), values=(
+                    p['name'],
+                    p['pid'],
+                    ""
+                ))
+            
+            self.log(f"已加载 {len(processes)} 个进程")
+            threading.Thread(target=resolve_titles, daemon=True).start()
+        
+        load_processes()
         
         # 选择按钮
         def on_select():
@@ -374,7 +498,7 @@ class MainWindow:
             self.target_pid = values[1]
             self.target_process_name = values[0]
             
-            title_info = f" - {values[2]}" if values[2] != "(无窗口)" else ""
+            title_info = f" - {values[2]}" if values[2] not in ("", "(无窗口)") else ""
             self.process_label.config(
                 text=f"{values[0]} (PID: {values[1]}){title_info}",
                 foreground="green"
@@ -383,7 +507,11 @@ class MainWindow:
             self.log(f"✓ 已选择进程: {values[0]} (PID: {values[1]})")
             dialog.destroy()
         
-        ttk.Button(dialog, text="选择", command=on_select).pack(pady=10)
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        
+        ttk.Button(btn_frame, text="刷新", command=lambda: load_processes(refresh=True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="选择", command=on_select).pack(side=tk.LEFT, padx=5)
     
     def select_by_crosshair(self):
         """拖动瞄准器选择进程"""
@@ -455,16 +583,22 @@ class MainWindow:
     
     def on_packet_captured(self, packet_data):
         """封包捕获回调"""
-        # 添加到列表
-        self.captured_packets.append(packet_data)
+        # 在捕获线程中格式化列表行，UI 线程只负责插入（先追加行，保证 UI 线程按封包数读取时行已存在）
+        with self._packets_lock:
+            seq = len(self.captured_packets) + 1
+            self.packet_rows.append(self._packet_row_values(seq, packet_data))
+            
+            # 添加到列表
+            self.captured_packets.append(packet_data)
         
-        # 更新 UI (在主线程中)
-        self.root.after(0, self._add_packet_to_tree, packet_data)
+        # 更新 UI (在主线程中)：合并为定时批量刷新，不再每个封包调度一次
+        if not self._tree_flush_scheduled:
+            self._tree_flush_scheduled = True
+            self.root.after(self.TREE_FLUSH_INTERVAL_MS, self._flush_packets_to_tree)
     
-    def _add_packet_to_tree(self, packet_data):
-        """添加封包到树形列表"""
-        seq = len(self.captured_packets)
-        timestamp = packet_data['timestamp'].strftime('%H:%M:%S.%f')[:-3]
+    def _packet_row_values(self, seq, packet_data):
+        """生成封包在列表中的一行数据（在捕获线程中调用）"""
+        timestamp = datetime.fromtimestamp(packet_data['timestamp'] / 1e9).strftime('%H:%M:%S.%f')[:-3]
         direction = packet_data['direction']
         
         parsed = packet_data.get('parsed_data', {})
@@ -477,16 +611,106 @@ class MainWindow:
             function = "解析失败"
             plaintext = parsed.get('error', '')
         
-        self.packet_tree.insert("", tk.END, values=(
-            seq,
-            timestamp,
-            direction,
-            function,
-            plaintext
-        ))
+        return (seq, timestamp, direction, function, plaintext)
+    
+    def _flush_packets_to_tree(self):
+        """把上次刷新后捕获的封包批量添加到树形列表（行 iid 为封包序号）"""
+        self._tree_flush_scheduled = False
+        
+        # 用户已向上翻看历史封包时不追加，滚动到底部时再载入
+        if not self._tree_follow:
+            return
         
-        # 自动滚动到底部
-        self.packet_tree.yview_moveto(1.0)
+        # 用户向上滚动离开底部时也不追加（追加并裁剪顶部会让视图跳动），保持当前位置，回到底部后继续
+        tree = self.packet_tree
+        if tree.yview()[1] < self.TREE_BOTTOM_THRESHOLD:
+            return
+        
+        packets = self.captured_packets
+        rows = self.packet_rows
+        end = min(len(packets) + 1, self.tree_end + self.TREE_FLUSH_MAX_ROWS)
+        if end <= self.tree_end:
+            return
+        
+        # 行数据已在捕获线程中生成，这里只做插入
+        insert = tree.insert
+        for seq, row in enumerate(rows[self.tree_end - 1:end - 1], self.tree_end):
+            insert("", tk.END, iid=str(seq), values=row)
+        self.tree_end = end
+        
+        # 只保留最近的 MAX_TREE_ROWS 行
+        if self.tree_end - self.tree_start > self.MAX_TREE_ROWS:
+            new_start = self.tree_end - self.MAX_TREE_ROWS
+            tree.delete(*(str(seq) for seq in range(self.tree_start, new_start)))
+            self.tree_start = new_start
+        
+        # 自动滚动到底部（每批一次）
+        tree.yview_moveto(1.0)
+        
+        # 本批未插完的封包在下一次刷新时继续
+        if self.tree_end <= len(packets) and not self._tree_flush_scheduled:
+            self._tree_flush_scheduled = True
+            self.root.after(self.TREE_FLUSH_INTERVAL_MS, self._flush_packets_to_tree)
+    
+    def _on_tree_yscroll(self, first, last):
+        """列表滚动：更新滚动条，滚动到显示范围边缘时载入相邻的封包"""
+        self.packet_tree_scrollbar.set(first, last)
+        
+        if self._tree_paging:
+            return
+        
+        first, last = float(first), float(last)
+        if first <= 0.0 and self.tree_start > 1:
+            self._tree_paging = True
+            self.root.after_idle(self._load_tree_page, False)
+        elif last >= 1.0 and not self._tree_follow and self.tree_end <= len(self.captured_packets):
+            self._tree_paging = True
+            self.root.after_idle(self._load_tree_page, True)
+        elif last >= self.TREE_BOTTOM_THRESHOLD and self._tree_follow:
+            # 回到底部：补上停留期间积压的封包
+            if self.tree_end <= len(self.captured_packets) and not self._tree_flush_scheduled:
+                self._tree_flush_scheduled = True
+                self.root.after_idle(self._flush_packets_to_tree)
+    
+    def _load_tree_page(self, forward):
+        """
+        向前或向后载入 TREE_PAGE_ROWS 行，超出 MAX_TREE_ROWS 的行从另一端移除
+        
+        Args:
+            forward: True = 载入更新的封包（列表底部），False = 载入更早的封包（列表顶部）
+        """
+        try:
+            tree = self.packet_tree
+            
+            if forward:
+                new_end = min(self.tree_end + self.TREE_PAGE_ROWS, len(self.captured_packets) + 1)
+                for seq in range(self.tree_end, new_end):
+                    tree.insert("", tk.END, iid=str(seq), values=self.packet_rows[seq - 1])
+                self.tree_end = new_end
+                
+                while self.tree_end - self.tree_start > self.MAX_TREE_ROWS:
+                    tree.delete(str(self.tree_start))
+                    self.tree_start += 1
+                
+                # 已载入到最新封包，恢复跟随
+                if self.tree_end > len(self.captured_packets):
+                    self._tree_follow = True
+            else:
+                new_start = max(self.tree_start - self.TREE_PAGE_ROWS, 1)
+                anchor = str(self.tree_start)
+                for seq in range(self.tree_start - 1, new_start - 1, -1):
+                    tree.insert("", 0, iid=str(seq), values=self.packet_rows[seq - 1])
+                self.tree_start = new_start
+                
+                while self.tree_end - self.tree_start > self.MAX_TREE_ROWS:
+                    self.tree_end -= 1
+                    tree.delete(str(self.tree_end))
+                    self._tree_follow = False
+                
+                # 保持原来的首行可见，避免视图跳动
+                tree.see(anchor)
+        finally:
+            self._tree_paging = False
     
     def view_packet_detail(self, event):
         """查看封包详情"""
@@ -494,8 +718,8 @@ class MainWindow:
         if not selection:
             return
         
-        item = self.packet_tree.item(selection[0])
-        seq = int(item['values'][0])
+        # 行 iid 即封包序号
+        seq = int(selection[0])
         
         if seq > len(self.captured_packets):
             return
@@ -511,67 +735,74 @@ class MainWindow:
         text = scrolledtext.ScrolledText(dialog, font=("Consolas", 9))
         text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # 格式化显示
-        text.insert(tk.END, f"序号: {seq}\n")
-        text.insert(tk.END, f"时间: {packet_data['timestamp']}\n")
-        text.insert(tk.END, f"方向: {packet_data['direction']}\n")
-        text.insert(tk.END, f"源地址: {packet_data['src_addr']}:{packet_data['src_port']}\n")
-        text.insert(tk.END, f"目标地址: {packet_data['dst_addr']}:{packet_data['dst_port']}\n")
-        text.insert(tk.END, f"\n原始数据 (十六进制):\n")
+        # 格式化显示（拼接完整文本后一次性插入）
+        parts = []
+        parts.append(f"序号: {seq}\n")
+        parts.append(f"时间: {datetime.fromtimestamp(packet_data['timestamp'] / 1e9)}\n")
+        parts.append(f"方向: {packet_data['direction']}\n")
+        parts.append(f"源地址: {packet_data['src_addr']}:{packet_data['src_port']}\n")
+        parts.append(f"目标地址: {packet_data['dst_addr']}:{packet_data['dst_port']}\n")
+        parts.append(f"\n原始数据 (十六进制):\n")
         
-        payload_hex = ' '.join(f'{b:02X}' for b in packet_data['payload'])
-        text.insert(tk.END, payload_hex + "\n")
+        payload_hex = packet_data['payload'].hex(' ').upper()
+        parts.append(payload_hex + "\n")
         
         # 添加 ASCII 码显示
-        text.insert(tk.END, f"\nASCII 码:\n")
-        ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in packet_data['payload'])
-        text.insert(tk.END, ascii_str + "\n")
+        parts.append(f"\nASCII 码:\n")
+        ascii_str = bytes(packet_data['payload']).translate(_PRINTABLE_ASCII_TABLE).decode('ascii')
+        parts.append(ascii_str + "\n")
         
         # 添加解密后的十六进制（如果有）
         parsed = packet_data.get('parsed_data', {})
         if parsed.get('success'):
-            text.insert(tk.END, f"\n解密后数据 (十六进制):\n")
-            text.insert(tk.END, parsed.get('decrypted_hex', '') + "\n")
+            parts.append(f"\n解密后数据 (十六进制):\n")
+            parts.append(parsed.get('decrypted_hex', '') + "\n")
             
-            text.insert(tk.END, f"\n解析结果:\n")
-            text.insert(tk.END, f"功能: {parsed.get('function_name', '未知')}\n")
-            text.insert(tk.END, f"功能码: {parsed.get('function_code', 0)}\n")
+            parts.append(f"\n解析结果:\n")
+            parts.append(f"功能: {parsed.get('function_name', '未知')}\n")
+            parts.append(f"功能码: {parsed.get('function_code', 0)}\n")
             
             # 显示核心数据
             core_data = parsed.get('core_data', {})
             if core_data:
-                text.insert(tk.END, f"\n核心参数:\n")
-                text.insert(tk.END, f"  参数1: {core_data.get('param1', 0)}\n")
-                text.insert(tk.END, f"  参数2: {core_data.get('param2', 0)}\n")
-                text.insert(tk.END, f"  参数3: {core_data.get('param3', 0)}\n")
-                text.insert(tk.END, f"  参数4: {core_data.get('param4', 0)}\n")
-                text.insert(tk.END, f"  参数5: {core_data.get('param5', 0)}\n")
+                parts.append(f"\n核心参数:\n")
+                parts.append(f"  参数1: {core_data.get('param1', 0)}\n")
+                parts.append(f"  参数2: {core_data.get('param2', 0)}\n")
+                parts.append(f"  参数3: {core_data.get('param3', 0)}\n")
+                parts.append(f"  参数4: {core_data.get('param4', 0)}\n")
+                parts.append(f"  参数5: {core_data.get('param5', 0)}\n")
             
             # 显示扩展数据
             ext_data = parsed.get('extended_data')
             if ext_data:
-                text.insert(tk.END, f"\n扩展数据:\n")
+                parts.append(f"\n扩展数据:\n")
                 if ext_data.get('text'):
-                    text.insert(tk.END, f"  文本: {ext_data['text']}\n")
-                text.insert(tk.END, f"  长度: {ext_data.get('length', 0)} 字节\n")
+                    parts.append(f"  文本: {ext_data['text']}\n")
+                parts.append(f"  长度: {ext_data.get('length', 0)} 字节\n")
                 if ext_data.get('raw_bytes'):
-                    raw_hex = ' '.join(f'{b:02X}' for b in ext_data['raw_bytes'])
-                    text.insert(tk.END, f"  原始: {raw_hex}\n")
+                    raw_hex = ext_data['raw_bytes'].hex(' ').upper()
+                    parts.append(f"  原始: {raw_hex}\n")
             
-            text.insert(tk.END, f"\n明文格式:\n")
-            text.insert(tk.END, parsed.get('plaintext', '') + "\n")
+            parts.append(f"\n明文格式:\n")
+            parts.append(parsed.get('plaintext', '') + "\n")
         else:
-            text.insert(tk.END, f"\n解析失败:\n")
-            text.insert(tk.END, parsed.get('error', '未知错误') + "\n")
+            parts.append(f"\n解析失败:\n")
+            parts.append(parsed.get('error', '未知错误') + "\n")
+        
+        text.insert(tk.END, ''.join(parts))
         
         text.config(state=tk.DISABLED)
     
     def clear_packets(self):
         """清空封包列表"""
         if messagebox.askyesno("确认", "确定要清空封包列表吗？"):
-            self.captured_packets.clear()
-            for item in self.packet_tree.get_children():
-                self.packet_tree.delete(item)
+            with self._packets_lock:
+                self.captured_packets.clear()
+                self.packet_rows.clear()
+            self.packet_tree.delete(*self.packet_tree.get_children())
+            self.tree_start = 1
+            self.tree_end = 1
+            self._tree_follow = True
             self.log("✓ 已清空封包列表")
     
     def export_packets(self):
@@ -586,50 +817,71 @@ class MainWindow:
         )
         
         if filename:
-            try:
-                import json
-                
-                data = []
-                for i, packet in enumerate(self.captured_packets, 1):
-                    # 处理解析结果，移除不可序列化的对象
-                    parsed = packet.get('parsed_data', {})
-                    parsed_clean = {}
-                    
-                    if parsed:
-                        for key, value in parsed.items():
-                            if key == 'extended_data' and isinstance(value, dict):
-                                # 处理扩展数据中的 bytes
-                                ext_clean = {}
-                                for k, v in value.items():
-                                    if k == 'raw_bytes' and isinstance(v, bytes):
-                                        ext_clean[k] = v.hex()  # 转换为十六进制字符串
-                                    else:
-                                        ext_clean[k] = v
-                                parsed_clean[key] = ext_clean
-                            elif isinstance(value, bytes):
-                                parsed_clean[key] = value.hex()
-                            else:
-                                parsed_clean[key] = value
-                    
-                    data.append({
-                        "序号": i,
-                        "时间": packet['timestamp'].isoformat(),
-                        "方向": packet['direction'],
-                        "源地址": f"{packet['src_addr']}:{packet['src_port']}",
-                        "目标地址": f"{packet['dst_addr']}:{packet['dst_port']}",
-                        "原始数据": packet['payload'].hex(),
-                        "解析结果": parsed_clean
-                    })
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                self.log(f"✓ 已导出 {len(data)} 个封包到: {filename}", "SUCCESS")
-                messagebox.showinfo("成功", f"已导出 {len(data)} 个封包")
-                
-            except Exception as e:
-                messagebox.showerror("错误", f"导出失败:\n{e}")
-                self.log(f"✗ 导出失败: {e}", "ERROR")
+            # 在后台线程中写文件，避免大量封包导出时界面卡住；导出期间禁用导出按钮
+            snapshot = list(self.captured_packets)
+            self.export_btn.config(state=tk.DISABLED)
+            self.log(f"正在导出 {len(snapshot)} 个封包...")
+            threading.Thread(target=self._do_export, args=(filename, snapshot), daemon=True).start()
+    
+    def _do_export(self, filename, packets):
+        """导出线程：写入 JSON 文件，完成后回到主线程提示结果"""
+        count = 0
+        error = None
+        
+        try:
+            import json
+            
+            # 逐个封包转换并写入文件（流式写出 JSON 数组，不在内存中构建完整列表）
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write("[")
+                for i, packet in enumerate(packets, 1):
+                    entry = json.dumps(self._export_entry(i, packet), ensure_ascii=False, indent=2)
+                    # 与 json.dump(indent=2) 的数组格式一致：元素整体缩进 2 个空格
+                    f.write(("\n  " if i == 1 else ",\n  ") + entry.replace("\n", "\n  "))
+                    count = i
+                f.write("\n]" if count else "]")
+        
+        except Exception as e:
+            error = e
+        
+        self.root.after(0, self._export_done, filename, count, error)
+    
+    def _export_done(self, filename, count, error):
+        """导出完成（主线程）"""
+        self.export_btn.config(state=tk.NORMAL)
+        
+        if error is None:
+            self.log(f"✓ 已导出 {count} 个封包到: {filename}", "SUCCESS")
+            messagebox.showinfo("成功", f"已导出 {count} 个封包")
+        else:
+            messagebox.showerror("错误", f"导出失败:\n{error}")
+            self.log(f"✗ 导出失败: {error}", "ERROR")
+    
+    def _export_entry(self, i, packet):
+        """将单个封包转换为可 JSON 序列化的导出条目"""
+        # 处理解析结果，移除不可序列化的对象
+        parsed = packet.get('parsed_data', {})
+        if hasattr(parsed, 'to_dict'):
+            parsed = parsed.to_dict()
+        parsed_clean = {
+            key: value.hex() if isinstance(value, bytes) else value
+            for key, value in (parsed or {}).items()
+        }
+        
+        # 扩展数据中只有 raw_bytes 是 bytes，转换为十六进制字符串
+        ext = parsed_clean.get('extended_data')
+        if isinstance(ext, dict) and isinstance(ext.get('raw_bytes'), bytes):
+            parsed_clean['extended_data'] = dict(ext, raw_bytes=ext['raw_bytes'].hex())
+        
+        return {
+            "序号": i,
+            "时间": datetime.fromtimestamp(packet['timestamp'] / 1e9).isoformat(),
+            "方向": packet['direction'],
+            "源地址": f"{packet['src_addr']}:{packet['src_port']}",
+            "目标地址": f"{packet['dst_addr']}:{packet['dst_port']}",
+            "原始数据": packet['payload'].hex(),
+            "解析结果": parsed_clean
+        }
     
     def connect_server(self):
         """连接服务器"""
@@ -647,7 +899,7 @@ class MainWindow:
         if self.is_running and self.interceptor:
             stats = self.interceptor.get_stats()
             self.stats_label.config(
-                text=f"总计: {stats['total']} | 解析成功: {stats['parsed']} | 解析失败: {stats['failed']} | 速率: {stats['rate']}"
+                text=f"总计: {stats['total']} | 解析成功: {stats['parsed']} | 解析失败: {stats['failed']} | 丢弃: {stats['dropped']} | 速率: {stats['rate']}"
             )
             self.root.after(1000, self.update_stats)
     
@@ -656,8 +908,30 @@ class MainWindow:
         timestamp = datetime.now().strftime('%H:%M:%S')
         line = f"[{timestamp}] {msg}\n"
         
+        # 先放入队列，定时批量写入日志区域
+        self._log_queue.append((line, level))
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.root.after(self.LOG_FLUSH_INTERVAL_MS, self._flush_log)
+    
+    def _flush_log(self):
+        """把队列中的日志一次性写入日志区域，并限制日志总行数"""
+        self._log_flush_scheduled = False
+        
+        # insert 支持多组 (文本, 标签)，一次调用写入全部日志
+        args = []
+        while self._log_queue:
+            args.extend(self._log_queue.popleft())
+        if not args:
+            return
+        
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, line, level)
+        self.log_text.insert(tk.END, *args)
+        
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > self.MAX_LOG_LINES:
+            self.log_text.delete('1.0', f'{self.LOG_TRIM_LINES + 1}.0')
+        
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
     